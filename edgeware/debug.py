@@ -7,11 +7,13 @@ from src.paths import Process
 print("""Which feature would you like to run?
 0. Quit
 1. Edgeware (start.py)
-2. Config (config.py)""")
+2. Config (config.py)
+3. Benchmarks (benchmark.py)""")
 
 processes = [
     [Process.MAIN],
-    [Process.CONFIG]
+    [Process.CONFIG],
+    [Process.BENCHMARK]
 ]  # fmt: off
 
 while True:
@@ -28,6 +30,6 @@ while True:
         subprocess.run([sys.executable] + processes[num - 1])
         print("Done")
     else:
-        print("Input must be between 0 and 2")
+        print(f"Input must be between 0 and {len(processes)}")
 
 print("Goodbye!")
@@ -0,0 +1,479 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import filetype
+import utils
+from features.image_cache import reduced_resize
+from features.placement import SIDE, PopupRects
+from pack import Pack
+from pack.data import MoodSet
+from pack.load import list_media, load_corruption, load_corruption_and_index, load_index, load_media_cache
+from paths import PATH, PackPaths
+from PIL import Image, ImageFilter
+from screeninfo import Monitor
+
+# Headers that are enough for filetype to recognize the files
+IMAGE_HEADER = b"\x89PNG\r\n\x1a\n" + bytes(24)
+VIDEO_HEADER = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom" + bytes(8)
+AUDIO_HEADER = b"ID3\x03\x00\x00\x00\x00\x00\x00" + bytes(20)
+
+
+def measure(function: Callable[[], object], repeat: int = 1) -> float:
+    """Best time of `repeat` runs in milliseconds"""
+    best = float("inf")
+    for n in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+def measure_calls(function: Callable[[], object], calls: int = 1000) -> float:
+    """Average time of a single call in microseconds"""
+    start = time.perf_counter()
+    for n in range(calls):
+        function()
+    return round((time.perf_counter() - start) / calls * 1000000, 3)
+
+
+def make_file_tree(root: Path, files: int, files_per_dir: int = 1000) -> None:
+    for i in range(files):
+        dir = root / f"dir{i // files_per_dir}"
+        if i % files_per_dir == 0:
+            dir.mkdir(parents=True, exist_ok=True)
+        (dir / f"file{i}.png").touch()
+
+
+def make_pack(root: Path, size: int) -> None:
+    """Write a pack with `size` media files, about one mood per 100 files and five corruption levels"""
+    random.seed(size)
+
+    mood_number = max(10, size // 100)
+    moods = [
+        {
+            "mood": f"mood{i}",
+            "maxClicks": random.randint(1, 5),
+            "captions": [f"Caption {j} of mood {i}" for j in range(50)],
+            "denial": [f"Denial {j} of mood {i}" for j in range(5)],
+            "subliminals": [f"Subliminal {j} of mood {i}" for j in range(20)],
+            "notifications": [f"Notification {j} of mood {i}" for j in range(5)],
+            "prompts": [f"prompt{j}mood{i}" for j in range(20)],
+            "web": [f"https://example.com/mood{i}/{j}" for j in range(3)],
+            "webArgs": [[f"?page={k}" for k in range(5)] for j in range(3)],
+            "media": [],
+        }
+        for i in range(mood_number)
+    ]
+
+    # 80% images, 15% videos and 5% audio, 90% of the media has a mood
+    types = [("img", ".png", IMAGE_HEADER, 0.8), ("vid", ".mp4", VIDEO_HEADER, 0.15), ("aud", ".mp3", AUDIO_HEADER, 0.05)]
+    for dir, extension, header, share in types:
+        (root / dir).mkdir(parents=True)
+        for i in range(int(size * share)):
+            name = f"{dir}{i}{extension}"
+            (root / dir / name).write_bytes(header)
+            if random.random() < 0.9:
+                random.choice(moods)["media"].append(name)
+
+    index = {
+        "default": {
+            "captions": [f"Default caption {i}" for i in range(1000)],
+            "prompts": [f"prompt{i}" for i in range(100)],
+            "promptMinLength": 3,
+            "promptMaxLength": 6,
+        },
+        "moods": moods,
+    }
+    (root / "index.json").write_text(json.dumps(index))
+
+    names = [mood["mood"] for mood in moods]
+    corruption = {
+        "moods": {str(i + 1): {"add": random.sample(names, mood_number // 5), "remove": random.sample(names, mood_number // 10)} for i in range(5)},
+        "wallpapers": {"default": "wallpaper.png"},
+        "config": {str(i + 1): {"delay": 5000 - i * 500} for i in range(5)},
+    }
+    (root / "corruption.json").write_text(json.dumps(corruption))
+
+    info = {"name": f"Benchmark {size}", "id": f"benchmark{size}", "creator": "Benchmark", "version": "1.0", "description": "Synthetic pack"}
+    (root / "info.json").write_text(json.dumps(info))
+
+
+@contextmanager
+def synthetic_pack(size: int) -> Iterator[PackPaths]:
+    # Pack logs its path relative to PATH, so it has to be inside of it
+    with tempfile.TemporaryDirectory(prefix="benchmark_", dir=PATH) as temp:
+        paths = PackPaths(Path(temp))
+        make_pack(paths.root, size)
+        try:
+            yield paths
+        finally:
+            shutil.rmtree(paths.cache, ignore_errors=True)
+
+
+def bench_mood_id(size: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as temp:
+        paths = PackPaths(Path(temp))
+        make_file_tree(paths.root, size)
+        try:
+            return {
+                "uncached": measure(lambda: utils.compute_mood_id(paths)),
+                "cached": measure(lambda: utils.compute_mood_id(paths), repeat=5),
+            }
+        finally:
+            shutil.rmtree(paths.cache, ignore_errors=True)
+
+
+def bench_loading(size: int) -> dict[str, float]:
+    """Milliseconds"""
+    with synthetic_pack(size) as paths:
+
+        def list_images() -> list[Path]:
+            return list_media(paths.image, filetype.is_image, load_media_cache(paths))
+
+        results = {
+            "load_index": measure(lambda: load_index(paths), repeat=3),
+            "load_corruption": measure(lambda: load_corruption(paths), repeat=3),
+            "load_corruption_and_index_uncached": measure(lambda: load_corruption_and_index(paths)),
+            "load_corruption_and_index_cached": measure(lambda: load_corruption_and_index(paths), repeat=3),
+            "list_media_uncached": measure(lambda: list_media(paths.image, filetype.is_image)),
+            "compute_mood_id_uncached": measure(lambda: utils.compute_mood_id(paths)),
+            "compute_mood_id_cached": measure(lambda: utils.compute_mood_id(paths), repeat=3),
+        }
+
+        # The entries above have written the snapshot and mood ID cache
+        shutil.rmtree(paths.cache, ignore_errors=True)
+        results["pack_uncached"] = measure(lambda: Pack(paths.root))
+        results["list_media_cached"] = measure(list_images, repeat=3)
+        results["pack_cached"] = measure(lambda: Pack(paths.root), repeat=3)
+
+        def lazy_first_image() -> float:
+            start = time.perf_counter()
+            pack = Pack(paths.root, lazy=True)
+            while not pack.random_image():
+                time.sleep(0.001)
+            elapsed = time.perf_counter() - start
+
+            pack.hypno_media.wait()
+            return elapsed
+
+        results["pack_lazy_first_image"] = round(min(lazy_first_image() for n in range(3)) * 1000, 3)
+        return results
+
+
+def bench_selection(size: int) -> dict[str, float]:
+    """Microseconds per call"""
+    with synthetic_pack(size) as paths:
+        pack = Pack(paths.root)
+        image = pack.random_image()
+
+        results = {
+            "random_image": measure_calls(pack.random_image),
+            "random_image_unweighted": measure_calls(lambda: pack.random_image(unweighted=True)),
+            "random_video": measure_calls(pack.random_video),
+            "random_audio": measure_calls(pack.random_audio),
+            "random_caption": measure_calls(pack.random_caption),
+            "random_caption_media": measure_calls(lambda: pack.random_caption(image)),
+            "random_clicks_to_close": measure_calls(lambda: pack.random_clicks_to_close(image)),
+            "random_denial": measure_calls(pack.random_denial),
+            "random_subliminal": measure_calls(pack.random_subliminal),
+            "random_notification": measure_calls(pack.random_notification),
+            "random_prompt": measure_calls(pack.random_prompt),
+            "random_web": measure_calls(pack.random_web),
+        }
+
+        # Corruption fade returns a new set of active moods on some calls
+        level = pack.corruption_levels[0]
+        pack.get_active_moods = lambda: pack.active_moods if random.random() < 0.5 else MoodSet(pack.active_moods | level.added_moods)
+        results["random_image_fade"] = measure_calls(pack.random_image)
+        results["random_caption_fade"] = measure_calls(pack.random_caption)
+
+        return results
+
+
+def legacy_random_media(media_list: list[Path], media_ranks: dict[Path, int], find_mood: Callable[[Path], str | None], active_moods: MoodSet) -> Path | None:
+    """Pack.random_media before RecencySampler"""
+    filtered = [media for media in media_list if find_mood(media) in active_moods]
+    if not filtered:
+        return None
+
+    max_rank = len(media_list)
+    ranks = [media_ranks.get(media, max_rank) for media in filtered]
+    weights = [2 ** (16 * rank / max_rank) for rank in ranks]
+    media = random.choices(filtered, weights, k=1)[0]
+
+    for key, value in media_ranks.items():
+        media_ranks[key] = min(value + 1, max_rank)
+    media_ranks[media] = 1
+
+    return media
+
+
+def repeat_gaps(draw: Callable[[], Path | None], draws: int, bins: int, max_gap: int) -> list[int]:
+    """Histogram of the number of draws between selecting the same media again"""
+    histogram = [0] * (bins + 1)  # The last bin is for media that wasn't drawn before or only after max_gap draws
+    last_draw = {}
+    for n in range(draws):
+        media = draw()
+        gap = n - last_draw.get(media, -max_gap)
+        histogram[min(gap * bins // max_gap, bins)] += 1
+        last_draw[media] = n
+    return histogram
+
+
+def bench_sampler(size: int) -> dict[str, float]:
+    """
+    Compares the repeat gaps of RecencySampler with the legacy selection over
+    the same draws while switching between two sets of active moods, fails if
+    the distributions differ. Times are in milliseconds for all draws.
+    """
+
+    bins = 20
+    draws = 10 * size
+    critical = 45.3  # Chi-square with 20 degrees of freedom at p = 0.001
+
+    with synthetic_pack(size) as paths:
+        pack = Pack(paths.root)
+        moods = sorted(mood.name for mood in pack.index.moods)
+        mood_sets = [MoodSet(moods), MoodSet(moods[::2])]
+
+        def active_moods() -> MoodSet:
+            return mood_sets[draw_number // 50 % 2]
+
+        def legacy() -> list[int]:
+            nonlocal draw_number
+            draw_number = 0
+            ranks = {}
+
+            def draw() -> Path | None:
+                nonlocal draw_number
+                draw_number += 1
+                return legacy_random_media(pack.images, ranks, pack.find_media_mood_name, active_moods())
+
+            return repeat_gaps(draw, draws, bins, size)
+
+        def sampler() -> list[int]:
+            nonlocal draw_number
+            draw_number = 0
+            pack.get_active_moods = active_moods
+
+            def draw() -> Path | None:
+                nonlocal draw_number
+                draw_number += 1
+                return pack.random_image()
+
+            return repeat_gaps(draw, draws, bins, size)
+
+        draw_number = 0
+        random.seed(size)
+        start = time.perf_counter()
+        legacy_histogram = legacy()
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sampler_histogram = sampler()
+        sampler_time = time.perf_counter() - start
+
+    # Two sample chi-square over the bins, both have the same number of draws
+    chi_square = sum((a - b) ** 2 / (a + b) for a, b in zip(legacy_histogram, sampler_histogram) if a + b)
+    assert chi_square < critical, f"Repeat gap distributions differ: chi-square {chi_square:.1f}"
+
+    return {"legacy": round(legacy_time * 1000, 3), "sampler": round(sampler_time * 1000, 3), "chi_square": round(chi_square, 2)}
+
+
+def decode(path: Path, width: int, height: int, reduced: bool) -> Image.Image:
+    image = Image.open(path)
+    if reduced:
+        return reduced_resize(image, width, height)
+
+    image.load()
+    return image.resize((width, height), Image.LANCZOS).convert("RGBA")
+
+
+def peak_memory() -> int:
+    """Peak resident memory of this process in bytes"""
+    try:
+        # Unlike ru_maxrss on Linux, not inherited from the parent process
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) * 1024
+    except OSError:
+        import resource  # Not available on Windows
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Bytes on macOS
+
+
+def decode_peak_memory(path: str, width: int, height: int, reduced: bool) -> int:
+    """Bytes the peak memory grows by when decoding, called in a new process by bench_decode"""
+    before = peak_memory()
+    decode(Path(path), width, height, reduced)
+    return peak_memory() - before
+
+
+def bench_decode(size: int) -> dict[str, float]:
+    """
+    Milliseconds and peak memory growth in megabytes, size is the width of a
+    4:3 photo resized to 540 pixels wide. The peak can't be reset, so memory
+    is measured in a new process for each decode, except on Windows.
+    """
+    random.seed(size)
+    width, height = size, size * 3 // 4
+    target_width, target_height = width * 540 // size, height * 540 // size
+
+    # Noise compresses about as badly as a photo
+    noise = Image.frombytes("L", (width // 8, height // 8), random.randbytes(width // 8 * (height // 8)))
+    photo = Image.merge("RGB", [noise.resize((width, height), Image.BICUBIC)] * 3).filter(ImageFilter.GaussianBlur(1))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp:
+        for format in ["JPEG", "PNG"]:
+            path = Path(temp) / f"photo.{format.lower()}"
+            photo.save(path, format)
+
+            for name, reduced in [("full", False), ("reduced", True)]:
+                results[f"{format.lower()}_{name}"] = measure(lambda: decode(path, target_width, target_height, reduced), repeat=3)
+
+                if sys.platform != "win32":
+                    code = f"import benchmark; print(benchmark.decode_peak_memory({str(path)!r}, {target_width}, {target_height}, {reduced}))"
+                    output = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent, capture_output=True, text=True, check=True).stdout
+                    results[f"{format.lower()}_{name}_mb"] = round(int(output.split()[-1]) / 1024 / 1024, 3)
+
+    return results
+
+
+def legacy_position_weights(columns: list[int], rows: list[int], width: int, height: int, geometries: list[str]) -> list[float]:
+    """Popup placement before PopupRects, with geometry strings standing in for the Tk calls"""
+    weights = []
+    for sx in columns:
+        for sy in rows:
+            weight = float("inf") if geometries else 1
+            for geometry in geometries:
+                w, h, x, y = map(int, geometry.replace("x", "+").split("+"))
+                intersection = max(0, min(sx + width, x + w) - max(sx, x)) * max(0, min(sy + height, y + h) - max(sy, y))
+                nonoverlap = 1 - intersection / (width * height)
+                distance_squared = (sx + width / 2 - (x + w / 2)) ** 2 + (sy + height / 2 - (y + h / 2)) ** 2
+                weight = min(2 ** (32 * nonoverlap) + distance_squared, weight)
+            weights.append(weight)
+    return weights
+
+
+def bench_placement(size: int) -> dict[str, float]:
+    """Milliseconds to place a popup on a 4K monitor, size is the number of open popups"""
+    random.seed(size)
+    monitor = Monitor(0, 0, 3840, 2160)
+
+    def random_rect() -> tuple[int, int, int, int]:
+        width, height = random.randint(400, 1500), random.randint(400, 1500)
+        return random.randint(0, monitor.width - width), random.randint(0, monitor.height - height), width, height
+
+    rects = [random_rect() for n in range(size)]
+    geometries = [f"{w}x{h}+{x}+{y}" for x, y, w, h in rects]
+    _, _, width, height = random_rect()
+    columns = [x_index * SIDE for x_index in range((monitor.width - width) // SIDE)]
+    rows = [y_index * SIDE for y_index in range((monitor.height - height) // SIDE)]
+
+    popup_rects = PopupRects()
+    for popup, rect in enumerate(rects):
+        popup_rects.set(popup, monitor, *rect)
+
+    def move() -> list[float]:
+        # A single popup moved since the last placement, like try_move does
+        x, y, w, h = rects[0]
+        rects[0] = (x + random.choice([-1, 1]), y, w, h)
+        popup_rects.set(0, monitor, *rects[0])
+        return popup_rects.position_weights(monitor, columns, rows, width, height)
+
+    return {
+        "cells": len(columns) * len(rows),
+        "legacy": measure(lambda: legacy_position_weights(columns, rows, width, height, geometries), repeat=3),
+        "occupancy_first": measure(lambda: popup_rects.position_weights(monitor, columns, rows, width, height)),
+        "occupancy_unchanged": measure(lambda: popup_rects.position_weights(monitor, columns, rows, width, height), repeat=3),
+        "occupancy_moved": measure(move, repeat=3),
+    }
+
+
+def bench_mpv_probe(size: int) -> dict[str, float]:
+    """Milliseconds to create `size` video players' GPU context, requires libmpv"""
+    # Imported here so that the other benchmarks don't require libmpv
+    from features.video_player import probe_gpu_context, supported_gpu_context
+
+    def cached() -> None:
+        supported_gpu_context.cache_clear()
+        for n in range(size):
+            supported_gpu_context()
+
+    return {
+        "per_player": measure(lambda: [probe_gpu_context() for n in range(size)]),
+        "cached": measure(cached),
+    }
+
+
+BENCHMARKS = {
+    "mood_id": bench_mood_id,
+    "loading": bench_loading,
+    "selection": bench_selection,
+    "sampler": bench_sampler,
+    "decode": bench_decode,
+    "placement": bench_placement,
+    "mpv_probe": bench_mpv_probe,
+}
+
+# Sizes used when none are given, file counts for most benchmarks
+DEFAULT_SIZES = {"sampler": [100, 1000], "decode": [1000, 2000, 4000, 6000], "placement": [1, 10, 50, 100], "mpv_probe": [1, 10, 50]}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PATH, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Edgeware++ benchmarks, results are printed as JSON")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run, all by default. Available: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Number of files in synthetic packs and file trees, or image widths for decode")
+    parser.add_argument("--output", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    results = {
+        "environment": {"commit": git_commit(), "python": sys.version.split()[0], "platform": platform.platform()},
+        "results": {
+            name: {str(size): BENCHMARKS[name](size) for size in args.sizes or DEFAULT_SIZES.get(name, [1000, 10000, 100000])}
+            for name in (args.benchmarks or BENCHMARKS)
+        },
+    }
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output)
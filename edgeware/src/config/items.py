@@ -201,6 +201,8 @@ CONFIG_ITEMS = {
     "toggle_internet": Item("toggleInternet", BOOLEAN, BooleanVar, None, block=True),
     "mpv_subprocess": Item("mpvSubprocess", BOOLEAN, BooleanVar, bool, block=True),
     "video_hardware_acceleration": Item("videoHardwareAcceleration", BOOLEAN, BooleanVar, bool),
+    "image_cache_size": Item("imageCacheSize", NONNEGATIVE, IntVar, int),
+    "window_pool_size": Item("windowPoolSize", NONNEGATIVE, IntVar, int),
     "panic_key": Item("panicButton", STRING, StringVar, str, block=True),
 
     # Scheduler
@@ -32,6 +32,7 @@ from config.vars import Vars
 from config.window.utils import log_file, request_legacy_panic_key
 from config.window.widgets.layout import (
     ConfigRow,
+    ConfigScale,
     ConfigSection,
     ConfigToggle,
 )
@@ -126,6 +127,26 @@ class TroubleshootingTab(ScrollFrame):
             hardware_acceleration_toggle, "Disabling hardware acceleration may increase CPU usage, but it can provide a more consistent and stable experience."
         )
 
+        image_cache_row = ConfigRow(troubleshooting_section)
+        image_cache_row.pack()
+
+        image_cache_scale = ConfigScale(image_cache_row, label="Image Cache Size (MB)", from_=0, to=2048, variable=vars.image_cache_size)
+        image_cache_scale.pack()
+        CreateToolTip(
+            image_cache_scale,
+            "Recently shown images are kept in memory so that showing them again doesn't require loading and resizing them.\n\n"
+            "Lower this if Edgeware++ uses too much memory, or set it to 0 to disable the cache.",
+        )
+
+        window_pool_scale = ConfigScale(image_cache_row, label="Popup Window Pool Size", from_=0, to=50, variable=vars.window_pool_size)
+        window_pool_scale.pack()
+        CreateToolTip(
+            window_pool_scale,
+            "Closed image and video popups are hidden and reused for new popups instead of being destroyed, "
+            "since creating windows is slow when many popups are opened.\n\n"
+            "This is the number of hidden windows kept, set it to 0 to always create new windows.",
+        )
+
         # Legacy
         legacy_section = ConfigSection(self.viewPort, "Legacy")
         legacy_section.pack()
@@ -0,0 +1,120 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import time
+from collections.abc import Callable
+from tkinter import TclError, Tk
+
+FRAME_INTERVAL = 10  # Milliseconds between frames when not under load
+MAX_FRAME_INTERVAL = 40
+
+# An animation is called once per frame with the milliseconds elapsed since
+# the previous frame and returns False once it's finished
+Animation = Callable[[float], bool]
+
+
+class Animator:
+    """
+    Runs all animations from a single Tk timer. If the frames take too long,
+    the interval between them is increased, so animations should depend on
+    the elapsed time instead of the number of frames.
+    """
+
+    def __init__(self, root: Tk) -> None:
+        self.root = root
+        self.animations: list[Animation] = []
+        self.running = False
+
+        self.interval = FRAME_INTERVAL
+        self.frame_time = 0.0  # Moving average of the time taken by a frame in milliseconds
+        self.last_frame = 0.0
+
+    def add(self, animation: Animation) -> None:
+        self.animations.append(animation)
+        if not self.running:
+            self.running = True
+            self.last_frame = time.perf_counter()
+            self.root.after(self.interval, self.frame)
+
+    def frame(self) -> None:
+        start = time.perf_counter()
+        elapsed = (start - self.last_frame) * 1000
+        self.last_frame = start
+
+        # Animations may be added while running the current ones
+        animations = self.animations
+        self.animations = []
+        self.animations = [animation for animation in animations if self.run(animation, elapsed)] + self.animations
+
+        self.frame_time = 0.9 * self.frame_time + 0.1 * (time.perf_counter() - start) * 1000
+        self.adapt_interval()
+
+        if self.animations:
+            self.root.after(self.interval, self.frame)
+        else:
+            self.running = False
+
+    def tween(self, duration: float, start: float, end: float, apply: Callable[[float], bool | None], on_finish: Callable[[], None] | None = None) -> None:
+        """
+        Change a value, such as the opacity of a window or the volume of an
+        audio player, linearly from start to end over duration milliseconds.
+        The value is computed from the elapsed time, so the duration stays the
+        same even if frames are late. Stops early if apply returns False or the
+        window has been destroyed.
+        """
+
+        time_passed = 0.0
+
+        def animation(elapsed: float) -> bool:
+            nonlocal time_passed
+            time_passed += elapsed
+            progress = min(time_passed / duration, 1) if duration > 0 else 1
+
+            try:
+                if apply(start + (end - start) * progress) is False:
+                    return False
+            except TclError:
+                return False
+
+            if progress < 1:
+                return True
+            if on_finish:
+                on_finish()
+            return False
+
+        apply(start)
+        self.add(animation)
+
+    def run(self, animation: Animation, elapsed: float) -> bool:
+        try:
+            return animation(elapsed)
+        except Exception as e:
+            logging.warning(f"Animation failed. Reason: {e}")
+            return False
+
+    def adapt_interval(self) -> None:
+        # Frames should leave at least half of the interval to everything else
+        interval = self.interval
+        if self.frame_time > interval / 2:
+            interval = min(interval * 2, MAX_FRAME_INTERVAL)
+        elif self.frame_time < interval / 8:
+            interval = max(interval // 2, FRAME_INTERVAL)
+
+        if interval != self.interval:
+            logging.info(f"Animation frame interval changed to {interval} ms, frame time {self.frame_time:.2f} ms.")
+            self.interval = interval
@@ -22,12 +22,10 @@ from typing import Callable
 
 import pyglet
 from config.settings import Settings
+from features.animator import Animator
 from pack import Pack
 from state import State
 
-# Run our update ticks once in `TICKRATE` milliseconds
-TICKRATE = 16  # 60 ticks per second
-
 
 def play_audio(root: Tk, settings: Settings, pack: Pack, state: State, audio: Path | None = None, on_stop: Callable[[], None] | None = None) -> None:
     audio = audio or pack.random_audio()
@@ -44,7 +42,7 @@ def play_audio(root: Tk, settings: Settings, pack: Pack, state: State, audio: Pa
 
     if not player.source.duration:
         logging.warning(f"Duration of {audio.name} could not be determined, fade-out will not function")
-        fade_in(root, settings, player, settings.fade_in_duration)
+        fade_in(state.animator, settings, player, settings.fade_in_duration)
         return
 
     audio_duration = int(player.source.duration * 1000)
@@ -56,8 +54,8 @@ def play_audio(root: Tk, settings: Settings, pack: Pack, state: State, audio: Pa
         fade_in_duration = int(audio_duration * fade_in_duration / fades_duration)
         fade_out_duration = audio_duration - fade_in_duration
 
-    fade_in(root, settings, player, fade_in_duration)
-    root.after(audio_duration - fade_out_duration, lambda: fade_out(root, player, fade_out_duration))
+    fade_in(state.animator, settings, player, fade_in_duration)
+    root.after(audio_duration - fade_out_duration, lambda: fade_out(state.animator, player, fade_out_duration))
 
 
 def stop_player(root: Tk, state: State, player: pyglet.media.Player, on_stop: Callable[[], None] | None = None) -> None:
@@ -67,28 +65,11 @@ def stop_player(root: Tk, state: State, player: pyglet.media.Player, on_stop: Ca
         root.after(0, on_stop)  # Run in main thread
 
 
-def fade_in(root: Tk, settings: Settings, player: pyglet.media.Player, duration: int) -> None:
+def fade_in(animator: Animator, settings: Settings, player: pyglet.media.Player, duration: int) -> None:
     """Gradually raise volume from 0 to the original level over `duration` milliseconds."""
-    player.volume = 0
-    steps = duration // TICKRATE
-    delta = settings.audio_volume / steps if steps else settings.audio_volume
-
-    def step() -> None:
-        player.volume = min(settings.audio_volume, player.volume + delta)
-        if player.volume < settings.audio_volume:
-            root.after(TICKRATE, step)
-
-    step()
-
-
-def fade_out(root: Tk, player: pyglet.media.Player, duration: int) -> None:
-    """Smoothly lower volume to 0 over `duration` milliseconds, then pause the player."""
-    steps = duration // TICKRATE
-    delta = player.volume / steps if steps else player.volume
+    animator.tween(duration, 0, settings.audio_volume, lambda volume: setattr(player, "volume", volume))
 
-    def step() -> None:
-        player.volume = max(0, player.volume - delta)
-        if player.volume > 0:
-            root.after(TICKRATE, step)
 
-    step()
+def fade_out(animator: Animator, player: pyglet.media.Player, duration: int) -> None:
+    """Smoothly lower volume to 0 over `duration` milliseconds."""
+    animator.tween(duration, player.volume, 0, lambda volume: setattr(player, "volume", volume))
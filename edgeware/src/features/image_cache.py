@@ -0,0 +1,157 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from threading import Lock
+
+from PIL import Image, ImageFilter
+
+LOG_INTERVAL = 100  # Lookups between logging the hit and miss counts
+BLUR_RADIUS = 2.5  # Largest blur radius applied at full resolution, larger blurs are done at a reduced size
+
+
+def image_size(image: Image.Image) -> int:
+    """Approximate memory used by the pixels of a decoded image in bytes"""
+    return image.width * image.height * len(image.getbands())
+
+
+def reduced_resize(image: Image.Image, width: int, height: int) -> Image.Image:
+    """
+    Resize an image to the given size and convert it to RGBA. JPEGs that
+    haven't been decoded yet are decoded at the smallest scale (1/2, 1/4 or
+    1/8) that is still at least the given size, other images are reduced by
+    an integer factor before resampling.
+    """
+
+    if image.format == "JPEG":
+        image.draft(image.mode, (width, height))  # Does nothing if already decoded
+    return image.resize((width, height), Image.LANCZOS, reducing_gap=3.0).convert("RGBA")
+
+
+class ImageCache:
+    """
+    Decoded source images and their resized variants, shared by all image
+    popups. The least recently used images are evicted once the memory budget
+    is exceeded. Popup sizes are whole percentages of the monitor size, so
+    the same image often gets resized to the same size again.
+    """
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget * 1024 * 1024  # Megabytes
+        self.entries: OrderedDict[tuple, Image.Image] = OrderedDict()
+        self.size = 0
+        self.lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: tuple) -> Image.Image | None:
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+            self.count(image is not None)
+            return image
+
+    def put(self, key: tuple, image: Image.Image) -> None:
+        size = image_size(image)
+        if size > self.budget:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                return
+
+            self.entries[key] = image
+            self.size += size
+            while self.size > self.budget:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= image_size(evicted)
+
+    def count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        if (self.hits + self.misses) % LOG_INTERVAL == 0:
+            logging.info(f"Image cache: {self.hits} hits, {self.misses} misses, {self.size / 1024 / 1024:.1f} MB used.")
+
+    def key(self, path: Path | None, *parts: object) -> tuple | None:
+        """Images are cached per path and modification time, images without a path aren't cached"""
+        try:
+            return (path, path.stat().st_mtime_ns, *parts)
+        except (AttributeError, OSError):
+            return None
+
+    def cached(self, key: tuple | None, make: Callable[[], Image.Image]) -> Image.Image:
+        if key is None:
+            return make()
+
+        image = self.lookup(key)
+        if image is None:
+            # Decoding and resizing is done without holding the lock
+            image = make()
+            self.put(key, image)
+        return image
+
+    def open(self, path: Path) -> Image.Image:
+        """
+        Return the cached source image if there is one. Otherwise the image is
+        only opened, its pixels are decoded by resize once the size is known.
+        """
+
+        key = self.key(path, "source")
+        return (key and self.lookup(key)) or Image.open(path)
+
+    def resize(self, path: Path | None, image: Image.Image, width: int, height: int) -> Image.Image:
+        """Return the image resized to the given size and converted to RGBA, the result must not be modified"""
+
+        def make() -> Image.Image:
+            resized = reduced_resize(image, width, height)
+
+            # JPEGs decoded at a reduced size can't be reused for larger sizes
+            source = self.key(path, "source")
+            if source and image.format != "JPEG":
+                self.put(source, image)
+            return resized
+
+        return self.cached(self.key(path, "resized", width, height), make)
+
+    def blur(self, path: Path | None, image: Image.Image, width: int, height: int, radius: float) -> Image.Image:
+        """
+        Blur the image resized to the given size. The blur is applied at a
+        reduced size and scaled back up, which looks the same but is much
+        cheaper since the cost depends on both the radius and the area.
+        """
+
+        def make() -> Image.Image:
+            scale = max(1, int(radius / BLUR_RADIUS))
+            small = self.resize(path, image, max(width // scale, 1), max(height // scale, 1))
+            return small.filter(ImageFilter.GaussianBlur(radius / scale)).resize((width, height), Image.BILINEAR)
+
+        return self.cached(self.key(path, "blur", width, height, radius), make)
+
+    def pixelate(self, path: Path | None, image: Image.Image, width: int, height: int, factor: int) -> Image.Image:
+        def make() -> Image.Image:
+            small = self.resize(path, image, max(width // factor, 1), max(height // factor, 1))
+            return small.resize((width, height), Image.NEAREST)
+
+        return self.cached(self.key(path, "pixelate", width, height, factor), make)
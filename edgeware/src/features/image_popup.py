@@ -19,7 +19,7 @@ import asyncio
 import logging
 from pathlib import Path
 from random import randint
-from tkinter import Label, Tk
+from tkinter import Tk
 from typing import Callable
 
 import booru
@@ -35,14 +35,20 @@ from state import State
 
 class ImagePopup(Popup):
     def __init__(self, root: Tk, settings: Settings, pack: Pack, state: State, media: Path | None = None, on_close: Callable[[], None] | None = None) -> None:
-        self.media = media or pack.random_image()
+        # The prefetched image is only used if no media was requested
+        prefetched = state.image_prefetcher.take() if not media and state.image_prefetcher else None
+        self.media = media or (prefetched.media if prefetched else pack.random_image())
         self.hypno = roll(settings.hypno_chance)
         if not self.should_init():
             return
         super().__init__(root, settings, pack, state, on_close)
 
         # TODO: Better booru integration
+        source = self.media
+        resized = None
+        size = None
         if self.settings.booru_download and roll(50):
+            source = None  # Booru images aren't cached since they're different every time
             try:
                 gel = booru.Gelbooru()
                 result = booru.resolve(asyncio.run(gel.search_image(query=self.settings.booru_tags, limit=1)))
@@ -51,9 +57,17 @@ class ImagePopup(Popup):
             except Exception:
                 logging.error(f'No results for tags "{self.settings.booru_tags}" on Gelbooru')
                 image = Image.open(self.media)
+        elif prefetched:
+            image, size, resized = prefetched.result()
         else:
-            image = Image.open(self.media)
-        self.compute_geometry(image.width, image.height)
+            image = self.state.image_cache.open(self.media)
+
+        # Prefetched JPEGs may have been decoded at a reduced size
+        size = size or image.size
+        if prefetched:
+            self.compute_geometry(*size, prefetched.monitor, prefetched.target_size)
+        else:
+            self.compute_geometry(*size)
 
         # Static          -> image
         # Static,   hypno -> image overlay, mpv
@@ -61,30 +75,33 @@ class ImagePopup(Popup):
         # Animated, hypno -> mpv, ?
 
         if getattr(image, "n_frames", 0) > 1:
-            self.player = VideoPlayer(self, self.settings, self.width, self.height)
+            self.player = VideoPlayer(self.window, self.settings, self.width, self.height)
             self.player.properties["glsl-shaders"] = self.try_denial_filter(True)
             self.player.play(str(self.media))
         else:
-            resized = image.resize((self.width, self.height), Image.LANCZOS).convert("RGBA")
+            # Filtered images are made from a smaller resized image, the image
+            # isn't resized to the full size at all
+            cache = self.state.image_cache
             filter = self.try_denial_filter(False)
             if filter == "resizeblur":
-                shrink_d = randint(5, 15)
-                resized = resized.resize((int(self.width / shrink_d), int(self.height / shrink_d)), Image.BILINEAR)
-                resized = resized.resize((self.width, self.height), Image.NEAREST)
-                filter = ""
-            final = resized.filter(filter) if filter else resized
+                final = cache.pixelate(source, image, self.width, self.height, randint(5, 15))
+            elif filter:
+                final = cache.blur(source, image, self.width, self.height, filter.radius)
+            else:
+                final = resized or cache.resize(source, image, self.width, self.height)
 
             if self.hypno:
-                self.player = VideoPlayer(self, self.settings, self.width, self.height)
+                self.player = VideoPlayer(self.window, self.settings, self.width, self.height)
                 self.player.properties["video-scale-x"] = max(self.width / self.height, 1)
                 self.player.properties["video-scale-y"] = max(self.height / self.width, 1)
+                final = final.copy()  # Cached images must not be modified
                 final.putalpha(int((1 - self.settings.hypno_opacity) * 255))
                 self.player.play(self.pack.random_hypno(), final)
             else:
-                label = Label(self, width=self.width, height=self.height)
-                label.pack()
                 self.photo_image = ImageTk.PhotoImage(final)
-                label.config(image=self.photo_image)
+                label = self.window.image_label
+                label.config(width=self.width, height=self.height, image=self.photo_image)
+                label.pack()
 
         self.init_finish()
 
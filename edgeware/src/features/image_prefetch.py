@@ -0,0 +1,100 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+
+import utils
+from config.settings import Settings
+from features.image_cache import ImageCache
+from features.popup import random_target_size, scale_to_monitor
+from pack import Pack
+from PIL import Image
+from screeninfo import Monitor
+
+PREFETCH_COUNT = 3
+
+
+@dataclass
+class PrefetchedImage:
+    media: Path
+    monitor: Monitor
+    target_size: float
+    draw: int | None  # Undone if the image is discarded, so that it doesn't count as recently shown
+    future: Future  # Source image, its original size and the resized RGBA image, or None for animated images
+
+    def result(self) -> tuple[Image.Image, tuple[int, int], Image.Image | None]:
+        return self.future.result()
+
+
+class ImagePrefetcher:
+    """
+    Decodes and resizes the images of upcoming image popups in the background.
+    The media, monitor and size of each popup are chosen in advance on the Tk
+    thread, only the image processing is done by the worker thread.
+    """
+
+    def __init__(self, settings: Settings, pack: Pack, cache: ImageCache) -> None:
+        self.settings = settings
+        self.pack = pack
+        self.cache = cache
+
+        self.queue: deque[PrefetchedImage] = deque()
+        self.worker = utils.DaemonWorker("ImagePrefetcher")
+
+    def take(self) -> PrefetchedImage | None:
+        # Images selected before the active moods changed may not be allowed
+        # anymore, they're discarded
+        active_moods = self.pack.get_active_moods()
+        prefetched = None
+        while self.queue and not prefetched:
+            next = self.queue.popleft()
+            if self.pack.find_media_mood_name(next.media) in active_moods:
+                prefetched = next
+            elif next.draw is not None:
+                self.pack.unselect_image(next.media, next.draw)
+
+        self.fill()
+        return prefetched
+
+    def fill(self) -> None:
+        while len(self.queue) < PREFETCH_COUNT:
+            media = self.pack.random_image()
+            if not media:
+                return
+
+            monitor = utils.random_monitor(self.settings)
+            target_size = random_target_size(self.settings)
+            future = self.worker.submit(self.prepare, media, monitor, target_size)
+            self.queue.append(PrefetchedImage(media, monitor, target_size, self.pack.image_draw(media), future))
+
+    def prepare(self, media: Path, monitor: Monitor, target_size: float) -> tuple[Image.Image, tuple[int, int], Image.Image | None]:
+        try:
+            # Resizing may decode a JPEG at a reduced size, which changes the size of the image
+            image = self.cache.open(media)
+            size = image.size
+            if getattr(image, "n_frames", 0) > 1:
+                return image, size, None
+
+            width, height = scale_to_monitor(*size, monitor, target_size)
+            return image, size, self.cache.resize(media, image, width, height)
+        except Exception as e:
+            logging.warning(f"Failed to prefetch {media.name}. Reason: {e}")
+            raise
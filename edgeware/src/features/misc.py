@@ -26,9 +26,11 @@ from threading import Thread
 from tkinter import Tk
 
 import pystray
+import utils
 from config.settings import Settings
 from desktop_notifier.common import Attachment, Icon
 from desktop_notifier.sync import DesktopNotifierSync
+from features.video_player import mpv_pool, mpv_worker
 from os_utils import make_shortcut, set_wallpaper
 from pack import Pack
 from panic import panic
@@ -39,6 +41,10 @@ from pypresence import Presence
 from roll import roll
 from state import State
 
+PACK_RELOAD_INTERVAL = 5000  # Milliseconds between checks for changed pack files
+MONITOR_REFRESH_INTERVAL = 10000  # Milliseconds between checks for changed monitors
+MPV_REAP_INTERVAL = 60000  # Milliseconds between terminating idle mpv players
+
 
 def open_web(pack: Pack, web: str | None = None) -> None:
     web = web or pack.random_web()
@@ -110,6 +116,56 @@ def handle_wallpaper(root: Tk, settings: Settings, pack: Pack, state: State) ->
         set_wallpaper(pack.wallpaper)
 
 
+def handle_pack_reload(root: Tk, settings: Settings, pack: Pack) -> None:
+    # Files are read in the background, the changes are applied on the Tk
+    # thread where media is selected
+    future = None
+
+    def check() -> None:
+        nonlocal future
+        if future and future.done():
+            try:
+                future.result()()
+            except Exception as e:
+                logging.warning(f"Reloading pack failed. Reason: {e}")
+            future = None
+
+        if future is None:
+            future = utils.run_in_thread(lambda: pack.reload(not settings.corruption_mode))
+        root.after(PACK_RELOAD_INTERVAL, check)
+
+    root.after(PACK_RELOAD_INTERVAL, check)
+
+
+def handle_monitor_refresh(root: Tk) -> None:
+    def refresh() -> None:
+        try:
+            utils.monitor_registry.refresh()
+        except Exception as e:
+            logging.warning(f"Refreshing monitors failed. Reason: {e}")
+        root.after(MONITOR_REFRESH_INTERVAL, refresh)
+
+    root.after(MONITOR_REFRESH_INTERVAL, refresh)
+
+
+def handle_mpv(root: Tk, settings: Settings) -> None:
+    # Started before the first video or hypno popup
+    if settings.video_chance > 0 or settings.hypno_chance > 0:
+        if settings.mpv_subprocess:
+            mpv_worker.start()
+        else:
+            Thread(target=lambda: mpv_pool.warm(settings), daemon=True).start()  # Thread for performance reasons
+
+    if settings.mpv_subprocess:
+        return
+
+    def reap() -> None:
+        mpv_pool.reap()
+        root.after(MPV_REAP_INTERVAL, reap)
+
+    root.after(MPV_REAP_INTERVAL, reap)
+
+
 def handle_discord(settings: Settings, pack: Pack) -> None:
     if not settings.show_on_discord:
         return
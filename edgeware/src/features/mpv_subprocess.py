@@ -15,24 +15,60 @@
 # You should have received a copy of the GNU General Public License
 # along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
 
-import ast
-import io
+# Worker process playing the videos of all popups in subprocess mode. Commands
+# are pickled tuples read from stdin, the worker exits when stdin is closed.
+
+import logging
+import os
+import pickle
 import sys
+from threading import Thread
 
 import mpv
 from PIL import Image
 
-_, wid, properties_str, media, overlay = sys.argv
-properties = ast.literal_eval(properties_str)
+players: dict[int, mpv.MPV] = {}
+
+
+def read_overlay(path: str, width: int, height: int, stride: int) -> Image.Image:
+    """Read the raw RGBA pixels written by write_overlay in video_player.py and delete the file"""
+    try:
+        with open(path, "rb") as file:
+            return Image.frombytes("RGBA", (width, height), file.read(), "raw", "RGBA", stride)
+    finally:
+        os.remove(path)
+
+
+def play(id: int, wid: int, properties: dict, media: str, overlay: tuple[str, int, int, int] | None) -> None:
+    # Read first so that the file is deleted even if creating the player fails
+    image = read_overlay(*overlay) if overlay else None
+
+    player = mpv.MPV(wid=wid)
+    for key, value in properties.items():
+        player[key] = value
+
+    if image:
+        player.create_image_overlay().update(image)
+
+    player.play(media)
+    players[id] = player
+
+
+def stop(id: int) -> None:
+    player = players.pop(id, None)
+    if player:
+        Thread(target=player.terminate, daemon=True).start()  # Terminating blocks until mpv has quit
+
 
-player = mpv.MPV(wid=wid)
-for key, value in properties.items():
-    player[key] = value
+commands = {"play": play, "stop": stop}
 
-if int(overlay):
-    bytes = sys.stdin.buffer.read()
-    image = Image.open(io.BytesIO(bytes))
-    player.create_image_overlay().update(image)
+while True:
+    try:
+        name, *args = pickle.load(sys.stdin.buffer)
+    except EOFError:
+        break
 
-player.play(media)
-player.wait_for_playback()
+    try:
+        commands[name](*args)
+    except Exception as e:
+        logging.warning(f"mpv worker failed to {name}. Reason: {e}")
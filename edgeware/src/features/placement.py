@@ -0,0 +1,206 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+from itertools import accumulate, repeat
+from math import ceil
+from operator import add
+
+from screeninfo import Monitor
+
+SIDE = 50  # Size of the squares popups are placed on
+CELL = 10  # Size of the squares occupancy is tracked in, SIDE must be a multiple of it
+
+Rect = tuple[int, int, int, int]  # x, y, width, height
+
+
+def nearest_distances(xs: list[float], sites: list[tuple[float, float]]) -> list[float]:
+    """
+    For each x in ascending xs, the minimum of (x - site_x) ** 2 + offset over
+    the sites given as (site_x, offset), computed from the lower envelope of
+    the parabolas in O(len(xs) + len(sites)) after sorting.
+    """
+
+    if not sites:
+        return [0.0] * len(xs)
+
+    # Only the lowest parabola at each x can be part of the envelope
+    lowest: dict[float, float] = {}
+    for x, offset in sites:
+        if offset < lowest.get(x, float("inf")):
+            lowest[x] = offset
+    qs = sorted(lowest)
+    fs = [lowest[q] for q in qs]
+
+    def intersection(i: int, j: int) -> float:
+        return (fs[j] + qs[j] ** 2 - fs[i] - qs[i] ** 2) / (2 * (qs[j] - qs[i]))
+
+    # Parabolas on the envelope and the x where each starts being the lowest
+    envelope = [0]
+    starts = [float("-inf")]
+    for j in range(1, len(qs)):
+        start = intersection(envelope[-1], j)
+        while start <= starts[-1]:
+            envelope.pop()
+            starts.pop()
+            start = intersection(envelope[-1], j)
+        envelope.append(j)
+        starts.append(start)
+
+    distances = []
+    k = 0
+    for x in xs:
+        while k + 1 < len(starts) and starts[k + 1] < x:
+            k += 1
+        i = envelope[k]
+        distances.append((x - qs[i]) ** 2 + fs[i])
+    return distances
+
+
+class Occupancy:
+    """
+    Area of a monitor covered by popups, tracked in a grid of CELL * CELL
+    squares. Rectangles are added and removed incrementally, and the summed
+    area table used to find the covered area of any rectangle in constant
+    time is only rebuilt right of the leftmost change.
+    """
+
+    def __init__(self, x: int, y: int, width: int, height: int) -> None:
+        self.x = x
+        self.y = y
+        self.columns = ceil(width / CELL)
+        self.rows = ceil(height / CELL)
+
+        # Covered pixels per square, popups covering each other are counted twice
+        self.coverage = [[0] * self.rows for n in range(self.columns)]
+        self.rects: dict[object, Rect] = {}
+
+        # Summed area table, columns from changed onwards are outdated
+        self.table = [[0] * (self.rows + 1) for n in range(self.columns + 1)]
+        self.changed = self.columns
+
+    def add(self, rect: Rect, sign: int) -> None:
+        x, y, width, height = rect
+        x -= self.x
+        y -= self.y
+
+        top = max(y // CELL, 0)
+        bottom = min(ceil((y + height) / CELL), self.rows)
+        overlaps_y = [min(y + height, (j + 1) * CELL) - max(y, j * CELL) for j in range(top, bottom)]
+
+        left = max(x // CELL, 0)
+        for i in range(left, min(ceil((x + width) / CELL), self.columns)):
+            overlap_x = sign * (min(x + width, (i + 1) * CELL) - max(x, i * CELL))
+            column = self.coverage[i]
+            column[top:bottom] = [covered + overlap_x * overlap_y for covered, overlap_y in zip(column[top:bottom], overlaps_y)]
+
+        self.changed = min(self.changed, left)
+
+    def sync(self, rects: dict[object, Rect]) -> None:
+        """Update the coverage to match the given rectangles, only changed rectangles are updated"""
+        for popup, rect in list(self.rects.items()):
+            if rects.get(popup) != rect:
+                self.add(rect, -1)
+                del self.rects[popup]
+
+        for popup, rect in rects.items():
+            if popup not in self.rects:
+                self.add(rect, 1)
+                self.rects[popup] = rect
+
+    def update_table(self) -> None:
+        # table[i][j] is the covered area of squares left of column i and
+        # above row j. The coverage of each square is limited to its own area.
+        for i in range(self.changed, self.columns):
+            column_sums = accumulate(map(min, self.coverage[i], repeat(CELL * CELL)), initial=0)
+            self.table[i + 1] = list(map(add, self.table[i], column_sums))
+        self.changed = self.columns
+
+    def position_weights(self, columns: list[int], rows: list[int], width: int, height: int) -> list[float]:
+        """
+        Weights for placing a width * height popup at each position in the grid
+        of columns * rows, ordered by column first. The positions must be on
+        the squares of this monitor. The weight decreases exponentially with
+        the share of the popup that would be covered. The squared distance to
+        the nearest popup is added, which spreads popups out once the monitor
+        is fully covered and every position would otherwise be equal.
+        """
+
+        self.update_table()
+        table = self.table
+
+        # The right and bottom edges of the popup fall inside squares, the
+        # coverage is assumed to be uniform within each square. This is off by
+        # at most a quarter of a square for each square on those edges, so the
+        # exponent of a weight is within 8 * CELL * (width + height + 2 * CELL)
+        # / (width * height) of using the exact covered area. That's about 3.8
+        # for a 50 * 50 popup, 1.8 for 100 * 100 and 0.5 for 400 * 300.
+        q, s = divmod(width / CELL, 1)
+        p, t = divmod(height / CELL, 1)
+        q, p = int(q), int(p)
+
+        # Squared distances from the centres of the positions to the nearest
+        # popup centre, one row of positions at a time
+        centres = [(x + w / 2, y + h / 2) for x, y, w, h in self.rects.values()]
+        centres_x = [sx + width / 2 for sx in columns]
+        distances = [nearest_distances(centres_x, [(px, (sy + height / 2 - py) ** 2) for px, py in centres]) for sy in rows]
+
+        area = width * height
+        weights = []
+        for column, sx in enumerate(columns):
+            i = (sx - self.x) // CELL
+            left, right, next = table[i], table[i + q], table[i + q + 1]
+            for row, sy in enumerate(rows):
+                top = (sy - self.y) // CELL
+                bottom = top + p
+
+                bottom_left = left[bottom] + t * (left[bottom + 1] - left[bottom])
+                bottom_right = right[bottom] + t * (right[bottom + 1] - right[bottom])
+                bottom_right += s * (next[bottom] + t * (next[bottom + 1] - next[bottom]) - bottom_right)
+                top_right = right[top] + s * (next[top] - right[top])
+
+                covered = bottom_right - bottom_left - top_right + left[top]
+                weights.append(2 ** (32 * (1 - min(covered / area, 1))) + distances[row][column])
+        return weights
+
+
+class PopupRects:
+    """
+    Rectangles of the open popups, updated by the popups when they're opened,
+    moved and closed so that they don't have to be queried from Tk. Changes
+    are applied to the occupancy of each monitor when the next popup is
+    placed, so a moving popup only costs one update per placement.
+    """
+
+    def __init__(self) -> None:
+        self.rects: dict[object, tuple[Rect, Rect]] = {}  # Popup -> monitor, popup rectangle
+        self.occupancy: dict[Rect, Occupancy] = {}
+
+    def set(self, popup: object, monitor: Monitor, x: int, y: int, width: int, height: int) -> None:
+        self.rects[popup] = ((monitor.x, monitor.y, monitor.width, monitor.height), (x, y, width, height))
+
+    def remove(self, popup: object) -> None:
+        self.rects.pop(popup, None)
+
+    def position_weights(self, monitor: Monitor, columns: list[int], rows: list[int], width: int, height: int) -> list[float]:
+        key = (monitor.x, monitor.y, monitor.width, monitor.height)
+        occupancy = self.occupancy.get(key)
+        if occupancy is None:
+            occupancy = Occupancy(*key)
+            self.occupancy[key] = occupancy
+
+        occupancy.sync({popup: rect for popup, (popup_monitor, rect) in self.rects.items() if popup_monitor == key})
+        return occupancy.position_weights(columns, rows, width, height)
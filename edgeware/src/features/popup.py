@@ -18,33 +18,47 @@
 import os
 import random
 import shutil
-import time
+from itertools import product
 from pathlib import Path
-from threading import Thread
-from tkinter import Button, Label, TclError, Tk, Toplevel
+from tkinter import Label, Tk
 from typing import Callable
 
 import utils
 from config.settings import Settings
 from desktop_notifier.common import Icon
 from desktop_notifier.sync import DesktopNotifierSync
+from features.animator import FRAME_INTERVAL
 from features.misc import mitosis_popup, open_web
-from os_utils import set_borderless, set_clickthrough
+from features.placement import SIDE
+from os_utils import set_clickthrough
 from pack import Pack
 from panic import panic
 from paths import Assets, Data
 from PIL import ImageFilter
 from roll import roll
+from screeninfo import Monitor
 from state import State
 
+FADE_OUT_DURATION = 1500  # Milliseconds to fade out from full opacity
 
-class Popup(Toplevel):
+
+def random_target_size(settings: Settings) -> float:
+    """Size of the longer side of a popup relative to the shorter side of its monitor"""
+    return (random.randint(30, 70) if not settings.lowkey_mode else random.randint(20, 50)) / 100
+
+
+def scale_to_monitor(source_width: int, source_height: int, monitor: Monitor, target_size: float) -> tuple[int, int]:
+    source_size = max(source_width, source_height) / min(monitor.width, monitor.height)
+    scale = target_size / source_size
+    return int(source_width * scale), int(source_height * scale)
+
+
+class Popup:
     media: Path  # Defined by subclasses
 
     def __init__(self, root: Tk, settings: Settings, pack: Pack, state: State, on_close: Callable[[], None] | None = None) -> None:
         state.popup_number += 1
         state.popups.append(self)
-        super().__init__(bg="black")
 
         self.root = root
         self.settings = settings
@@ -52,15 +66,16 @@ class Popup(Toplevel):
         self.state = state
         self.on_close = on_close
 
+        self.window = state.window_pool.take()
+        self.closed = False
+
         self.theme = settings.theme
         self.denial = roll(self.settings.denial_chance)
 
-        self.bind("<KeyPress>", lambda event: panic(self.root, self.settings, self.state, condition=(event.keysym == self.settings.panic_key)))
-        self.attributes("-topmost", True)
-        set_borderless(self)
+        self.window.bind("<KeyPress>", lambda event: panic(self.root, self.settings, self.state, condition=(event.keysym == self.settings.panic_key)))
 
         self.opacity = self.settings.opacity
-        self.attributes("-alpha", self.opacity)
+        self.window.attributes("-alpha", self.opacity)
 
     def init_finish(self) -> None:
         self.try_denial_text()
@@ -73,15 +88,9 @@ class Popup(Toplevel):
         self.try_pump_scare()
         self.try_clickthrough()
 
-    def compute_geometry(self, source_width: int, source_height: int) -> None:
-        self.monitor = utils.random_monitor(self.settings)
-
-        source_size = max(source_width, source_height) / min(self.monitor.width, self.monitor.height)
-        target_size = (random.randint(30, 70) if not self.settings.lowkey_mode else random.randint(20, 50)) / 100
-        scale = target_size / source_size
-
-        self.width = int(source_width * scale)
-        self.height = int(source_height * scale)
+    def compute_geometry(self, source_width: int, source_height: int, monitor: Monitor | None = None, target_size: float | None = None) -> None:
+        self.monitor = monitor or utils.random_monitor(self.settings)
+        self.width, self.height = scale_to_monitor(source_width, source_height, self.monitor, target_size or random_target_size(self.settings))
 
         if self.settings.lowkey_mode:
             corner = self.settings.lowkey_corner
@@ -93,38 +102,17 @@ class Popup(Toplevel):
             self.x = self.monitor.x + (self.monitor.width - self.width if right else 0)
             self.y = self.monitor.y + (self.monitor.height - self.height if bottom else 0)
         else:
-            positions = []
-            weights = []
-
             # Divide the area of possible coordinates with respect to the
             # monitor and popup sizes into a grid of side * side squares.
             # Considering each pixel individually is unnecessary and too slow.
-            side = 50
+            side = SIDE
             area_width = self.monitor.width - self.width
             area_height = self.monitor.height - self.height
-            for x_index in range(area_width // side):
-                for y_index in range(area_height // side):
-                    # Possible coordinates for this popup
-                    sx = x_index * side + self.monitor.x
-                    sy = y_index * side + self.monitor.y
-                    sw = self.width
-                    sh = self.height
-
-                    # Compute the weight for this position, preferring positions
-                    # that reduce popup overlap and clustering
-                    weight = float("inf") if self.state.popup_number > 1 else 1
-                    for popup in self.state.popups.copy():
-                        if popup is self:
-                            continue
-
-                        w, h, x, y = map(int, popup.geometry().replace("x", "+").split("+"))
-                        intersection = max(0, min(sx + sw, x + w) - max(sx, x)) * max(0, min(sy + sh, y + h) - max(sy, y))
-                        nonoverlap = 1 - intersection / (sw * sh)
-                        distance_squared = (sx + sw / 2 - (x + w / 2)) ** 2 + (sy + sh / 2 - (y + h / 2)) ** 2
-                        weight = min(2 ** (32 * nonoverlap) + distance_squared, weight)
-
-                    positions.append((sx, sy))
-                    weights.append(weight)
+            columns = [x_index * side + self.monitor.x for x_index in range(area_width // side)]
+            rows = [y_index * side + self.monitor.y for y_index in range(area_height // side)]
+
+            positions = list(product(columns, rows))
+            weights = self.state.popup_rects.position_weights(self.monitor, columns, rows, self.width, self.height)
 
             # Select a position inside the chosen square randomly
             min_x, min_y = random.choices(positions, weights)[0]
@@ -138,13 +126,14 @@ class Popup(Toplevel):
             self.x = random.randint(min_x, max_x)
             self.y = random.randint(min_y, max_y)
 
-        self.geometry(f"{self.width}x{self.height}+{self.x}+{self.y}")
+        self.window.show(f"{self.width}x{self.height}+{self.x}+{self.y}")
+        self.state.popup_rects.set(self, self.monitor, self.x, self.y, self.width, self.height)
 
     def try_clickthrough(self) -> None:
         if self.settings.clickthrough_enabled:
             if not hasattr(self, "player"):
-                self.wait_visibility()
-            set_clickthrough(self)
+                self.window.wait_visibility()
+            set_clickthrough(self.window)
 
     def try_denial_filter(self, mpv: bool) -> ImageFilter.Filter | str:
         if not self.denial:
@@ -161,14 +150,19 @@ class Popup(Toplevel):
     def try_denial_text(self) -> None:
         if self.denial:
             label = Label(
-                self, text=self.pack.random_denial(), wraplength=self.width, fg=self.theme.fg, bg=self.theme.bg, font=(self.theme.font, self.theme.font_size)
+                self.window,
+                text=self.pack.random_denial(),
+                wraplength=self.width,
+                fg=self.theme.fg,
+                bg=self.theme.bg,
+                font=(self.theme.font, self.theme.font_size),
             )
             label.place(relx=0.5, rely=0.5, anchor="c")
 
     def try_caption(self) -> None:
         caption = self.pack.random_caption(self.media)
         if self.settings.captions_in_popups and caption:
-            label = Label(self, text=caption, wraplength=self.width, fg=self.theme.fg, bg=self.theme.bg, font=(self.theme.font, self.theme.font_size))
+            label = Label(self.window, text=caption, wraplength=self.width, fg=self.theme.fg, bg=self.theme.bg, font=(self.theme.font, self.theme.font_size))
             label.place(x=5, y=5)
 
     def try_corruption_dev(self) -> None:
@@ -177,19 +171,25 @@ class Popup(Toplevel):
             is_mood_on = False
 
             mood = self.pack.index.media_moods.get(self.media.name, None)
-            for level in self.pack.corruption_levels:
+            for number, level in enumerate(self.pack.corruption_levels, start=1):
                 if mood in level.added_moods:
                     is_mood_on = True
                 elif mood in level.removed_moods:
                     is_mood_on = False
 
                 if is_mood_on:
-                    valid_levels.append(self.pack.corruption_levels.index(level) + 1)
+                    valid_levels.append(number)
 
-            label_mood = Label(self, text=f"Popup mood: {mood}", fg=self.theme.fg, bg=self.theme.bg, font=(self.theme.font, self.theme.font_size))
-            label_level = Label(self, text=f"Valid Levels: {valid_levels}", fg=self.theme.fg, bg=self.theme.bg, font=(self.theme.font, self.theme.font_size))
+            label_mood = Label(self.window, text=f"Popup mood: {mood}", fg=self.theme.fg, bg=self.theme.bg, font=(self.theme.font, self.theme.font_size))
+            label_level = Label(
+                self.window, text=f"Valid Levels: {valid_levels}", fg=self.theme.fg, bg=self.theme.bg, font=(self.theme.font, self.theme.font_size)
+            )
             label_current_level = Label(
-                self, text=f"Current Level: {self.state.corruption_level}", fg=self.theme.fg, bg=self.theme.bg, font=(self.theme.font, self.theme.font_size)
+                self.window,
+                text=f"Current Level: {self.state.corruption_level}",
+                fg=self.theme.fg,
+                bg=self.theme.bg,
+                font=(self.theme.font, self.theme.font_size),
             )
 
             label_mood.place(x=5, y=(self.height // 2))
@@ -198,10 +198,10 @@ class Popup(Toplevel):
 
     def try_button(self) -> None:
         if self.settings.buttonless:
-            self.bind("<ButtonRelease-1>", lambda _: self.click())
+            self.window.bind("<ButtonRelease-1>", lambda _: self.click())
         elif not self.settings.clickthrough_enabled:
-            button = Button(
-                self,
+            button = self.window.button
+            button.config(
                 text=self.pack.index.default.popup_close,
                 command=self.click,
                 fg=self.theme.fg,
@@ -213,56 +213,65 @@ class Popup(Toplevel):
             button.place(x=-10, y=-10, relx=1, rely=1, anchor="se")
 
     def try_move(self) -> None:
-        def move() -> None:
-            speed_x = 0 if self.settings.moving_chance else self.settings.moving_speed
-            speed_y = 0 if self.settings.moving_chance else self.settings.moving_speed
-            while speed_x == 0 and speed_y == 0:
-                speed_x = random.randint(-self.settings.moving_speed, self.settings.moving_speed)
-                speed_y = random.randint(-self.settings.moving_speed, self.settings.moving_speed)
-
-            try:
-                while True:
-                    self.x += speed_x
-                    self.y += speed_y
-
-                    left = self.x <= self.monitor.x
-                    right = self.x + self.width >= self.monitor.x + self.monitor.width
-                    if left or right:
-                        speed_x = -speed_x
-
-                    top = self.y <= self.monitor.y
-                    bottom = self.y + self.height >= self.monitor.y + self.monitor.height
-                    if top or bottom:
-                        speed_y = -speed_y
-
-                    self.geometry(f"{self.width}x{self.height}+{self.x}+{self.y}")
-                    time.sleep(0.01)
-            except TclError:
-                pass  # Exception thrown when closing
+        speed_x = 0 if self.settings.moving_chance else self.settings.moving_speed
+        speed_y = 0 if self.settings.moving_chance else self.settings.moving_speed
+        while speed_x == 0 and speed_y == 0:
+            speed_x = random.randint(-self.settings.moving_speed, self.settings.moving_speed)
+            speed_y = random.randint(-self.settings.moving_speed, self.settings.moving_speed)
+
+        # Speeds are in pixels per FRAME_INTERVAL milliseconds
+        x = float(self.x)
+        y = float(self.y)
+
+        def move(elapsed: float) -> bool:
+            nonlocal x, y, speed_x, speed_y
+            if self.closed:
+                return False
+
+            x += speed_x * elapsed / FRAME_INTERVAL
+            y += speed_y * elapsed / FRAME_INTERVAL
+            self.x = int(x)
+            self.y = int(y)
+
+            left = self.x <= self.monitor.x
+            right = self.x + self.width >= self.monitor.x + self.monitor.width
+            if left or right:
+                speed_x = -speed_x
+
+            top = self.y <= self.monitor.y
+            bottom = self.y + self.height >= self.monitor.y + self.monitor.height
+            if top or bottom:
+                speed_y = -speed_y
+
+            self.window.geometry(f"{self.width}x{self.height}+{self.x}+{self.y}")
+            self.state.popup_rects.set(self, self.monitor, self.x, self.y, self.width, self.height)
+            return True
 
         if roll(self.settings.moving_chance):
-            Thread(target=move, daemon=True).start()
+            self.state.animator.add(move)
 
     def try_multi_click(self) -> None:
         self.clicks_to_close = self.pack.random_clicks_to_close(self.media) if self.settings.multi_click_popups else 1
 
+    def set_opacity(self, opacity: float) -> bool:
+        # The window may already be used by another popup after closing
+        if self.closed:
+            return False
+
+        self.opacity = opacity
+        self.window.attributes("-alpha", opacity)
+        return True
+
     def try_timeout(self) -> None:
         def fade_out() -> None:
-            try:
-                while self.opacity > 0:
-                    self.opacity -= 0.01
-                    self.attributes("-alpha", self.opacity)
-                    time.sleep(0.015)
-                self.close()
-            except TclError:
-                pass  # Exception thrown when manually closed during fade out
+            self.state.animator.tween(self.opacity * FADE_OUT_DURATION, self.opacity, 0, self.set_opacity, self.close)
 
         if self.settings.timeout_enabled and not self.state.pump_scare:
-            self.after(self.settings.timeout, Thread(target=fade_out, daemon=True).start)
+            self.window.schedule(self.settings.timeout, fade_out)
 
     def try_pump_scare(self) -> None:
         if self.state.pump_scare:
-            self.after(2500, self.close)
+            self.window.schedule(2500, self.close)
 
     def try_web_open(self) -> None:
         if self.settings.web_on_popup_close and roll((100 - self.settings.web_chance) / 2):
@@ -291,9 +300,11 @@ class Popup(Toplevel):
         notifier.send(title=self.pack.info.name, message=f"{filename} has been successfully sent to blacklist")
 
     def close(self) -> None:
+        self.closed = True
         self.state.popup_number -= 1
         self.state.popups.remove(self)
+        self.state.popup_rects.remove(self)
         self.try_web_open()
-        self.destroy()
+        self.state.window_pool.give_back(self.window)
         if self.on_close:
             self.on_close()
@@ -21,17 +21,18 @@ from tkinter import Label, Toplevel
 import os_utils
 import utils
 from config.settings import Settings
+from features.animator import Animator
 from features.video_player import VideoPlayer
 from pack import Pack
 from PIL import Image, ImageTk
 
 
 class StartupSplash(Toplevel):
-    def __init__(self, settings: Settings, pack: Pack, callback: Callable[[], None]) -> None:
+    def __init__(self, settings: Settings, pack: Pack, animator: Animator, callback: Callable[[], None]) -> None:
         super().__init__(bg="black")
 
+        self.animator = animator
         self.callback = callback
-        self.opacity = 0
 
         self.attributes("-topmost", True)
         os_utils.set_borderless(self)
@@ -63,20 +64,13 @@ class StartupSplash(Toplevel):
         self.fade_in()
 
     def fade_in(self) -> None:
-        if self.opacity < 1:
-            self.opacity += 0.01
-            self.attributes("-alpha", self.opacity)
-            self.after(10, self.fade_in)
-        else:
-            self.after(2000, self.fade_out)
+        self.animator.tween(1000, 0, 1, lambda opacity: self.attributes("-alpha", opacity), lambda: self.after(2000, self.fade_out))
 
     def fade_out(self) -> None:
-        if self.opacity > 0:
-            self.opacity -= 2 * 0.01
-            self.attributes("-alpha", self.opacity)
-            self.after(10 // 4, self.fade_out)
-        else:
-            if hasattr(self, "player"):
-                self.player.close()
-            self.destroy()
-            self.callback()
+        self.animator.tween(100, 1, 0, lambda opacity: self.attributes("-alpha", opacity), self.close)
+
+    def close(self) -> None:
+        if hasattr(self, "player"):
+            self.player.close()
+        self.destroy()
+        self.callback()
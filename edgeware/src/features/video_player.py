@@ -15,21 +15,223 @@
 # You should have received a copy of the GNU General Public License
 # along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
 
-import io
 import logging
+import os
+import pickle
 import subprocess
 import sys
+import tempfile
+import time
+from functools import cache
+from itertools import count
 from pathlib import Path
-from threading import Thread
+from threading import Lock, Thread
 from tkinter import Label, Misc
 
 import mpv
 import os_utils
+import utils
 from config.settings import Settings
-from os_utils import close_mpv
 from paths import Process
 from PIL import Image
 
+GPU_CONTEXTS = ["x11", "x11egl", "x11vk"]
+MPV_POOL_SIZE = 4  # Idle mpv players kept for reuse
+MPV_IDLE_TIMEOUT = 300  # Seconds before an idle player is terminated
+MPV_STOP_TIMEOUT = 1  # Seconds to wait for a stopped player to release its window
+OVERLAY_PREFIX = "edgeware-overlay-"  # Temporary files of overlays sent to the mpv worker
+
+
+def probe_gpu_context() -> str | None:
+    """Find the first supported GPU context using a temporary mpv instance"""
+    probe = mpv.MPV()
+    try:
+        for context in GPU_CONTEXTS:
+            try:
+                probe["gpu-context"] = context  # Check if context is supported
+                return context
+            except TypeError:
+                logging.warning(f"mpv GPU context {context} is not supported")
+        return None
+    finally:
+        probe.terminate()
+
+
+@cache
+def supported_gpu_context() -> str | None:
+    """Creating an mpv instance is slow, so the GPU context is only probed once"""
+    return probe_gpu_context()
+
+
+def static_properties(settings: Settings) -> dict[str, str]:
+    """Properties that are the same for every player"""
+    properties = {
+        "loop": "inf",
+        "hwdec": "auto" if settings.video_hardware_acceleration else "no",
+        "input-cursor-passthrough": "yes",  # Required for buttonless closing
+    }
+
+    if os_utils.is_linux():
+        # Required on Wayland for embedding the player
+        context = supported_gpu_context()
+        if context:
+            properties["gpu-context"] = context
+
+    return properties
+
+
+class MpvPool:
+    """
+    Stopped mpv players with the static properties already set. Creating an
+    mpv instance is slow, so players are reused and only pointed to the
+    window of the next popup. At most MPV_POOL_SIZE idle players are kept and
+    players idle for longer than MPV_IDLE_TIMEOUT are terminated.
+    """
+
+    def __init__(self) -> None:
+        self.players: list[tuple[mpv.MPV, float]] = []  # Idle players and the time they were returned
+        self.lock = Lock()
+
+    def create(self, settings: Settings) -> mpv.MPV:
+        player = mpv.MPV()
+        for key, value in static_properties(settings).items():
+            player[key] = value
+        return player
+
+    def warm(self, settings: Settings) -> None:
+        while len(self.players) < MPV_POOL_SIZE:
+            player = self.create(settings)
+            with self.lock:
+                self.players.append((player, time.monotonic()))
+
+    def take(self, settings: Settings) -> mpv.MPV:
+        with self.lock:
+            if self.players:
+                return self.players.pop()[0]
+        return self.create(settings)
+
+    def give_back(self, player: mpv.MPV, properties: dict) -> None:
+        """
+        Stop the player and reset the properties set by the popup. The window
+        of the popup is reused or destroyed right after, so this waits until
+        the player is idle and no longer draws on it. Players that fail to
+        stop are closed the way the platform requires instead.
+        """
+        try:
+            player.stop()
+            deadline = time.monotonic() + MPV_STOP_TIMEOUT
+            while not player.idle_active:
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Player didn't become idle")
+                time.sleep(0.005)
+
+            for key in [*properties, "wid"]:
+                player[key] = player.option_info(key)["default-value"]
+        except Exception as e:
+            logging.warning(f"Failed to reset mpv player. Reason: {e}")
+            os_utils.close_mpv(player)
+            return
+
+        with self.lock:
+            if len(self.players) < MPV_POOL_SIZE:
+                self.players.append((player, time.monotonic()))
+                return
+        self.terminate([player])
+
+    def terminate(self, players: list[mpv.MPV]) -> None:
+        """Terminate idle players, they've already released their windows"""
+
+        def terminate() -> None:
+            for player in players:
+                player.terminate()
+
+        Thread(target=terminate, daemon=True).start()  # Terminating players blocks
+
+    def reap(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            expired = [player for player, returned in self.players if now - returned > MPV_IDLE_TIMEOUT]
+            self.players = [(player, returned) for player, returned in self.players if now - returned <= MPV_IDLE_TIMEOUT]
+
+        if expired:
+            self.terminate(expired)
+
+
+mpv_pool = MpvPool()
+
+
+def write_overlay(overlay: Image.Image) -> tuple[str, int, int, int]:
+    """
+    Write the raw RGBA pixels of an overlay to a temporary file for the mpv
+    worker, which deletes it. Returns the path, width, height and stride.
+    """
+
+    overlay = overlay.convert("RGBA")  # Does nothing if already RGBA
+    with tempfile.NamedTemporaryFile(prefix=OVERLAY_PREFIX, delete=False) as file:
+        file.write(overlay.tobytes())
+    return file.name, overlay.width, overlay.height, overlay.width * 4
+
+
+class MpvWorker:
+    """
+    Long running process playing the videos of all popups in subprocess
+    mode, so that a video doesn't require starting a Python interpreter and
+    importing mpv. Commands are pickled to its stdin in order by a single
+    thread. The process is started again if it has exited.
+    """
+
+    def __init__(self) -> None:
+        self.process: subprocess.Popen | None = None
+        self.ids = count()
+        self.overlays: set[str] = set()  # Overlay files written by this process that may not be read yet
+        self.worker = utils.DaemonWorker("MpvWorker")
+
+    def start(self) -> None:
+        self.worker.submit(self.ensure_running)
+
+    def ensure_running(self) -> None:
+        if not self.process or self.process.poll() is not None:
+            # Overlays sent to a worker that exited before reading them are
+            # left behind, a new worker has no overlays pending yet
+            for path in self.overlays:
+                Path(path).unlink(missing_ok=True)
+            self.overlays.clear()
+
+            self.process = subprocess.Popen([sys.executable, Process.MPV], stdin=subprocess.PIPE)
+
+    def send(self, command: tuple) -> bool:
+        try:
+            pickle.dump(command, self.process.stdin)
+            self.process.stdin.flush()
+            return True
+        except OSError as e:
+            logging.warning(f"Failed to send {command[0]} to the mpv worker. Reason: {e}")
+            return False
+
+    def play(self, wid: int, properties: dict, media: Path, overlay: Image.Image | None) -> int:
+        """Start playing in the window with the given id, returns the id of the player"""
+        id = next(self.ids)
+
+        def send_play() -> None:
+            self.ensure_running()
+            overlay_file = None
+            if overlay:
+                overlay_file = write_overlay(overlay)
+                self.overlays = {path for path in self.overlays if os.path.exists(path)}  # Deleted by the worker once read
+                self.overlays.add(overlay_file[0])
+
+            if not self.send(("play", id, wid, properties, str(media), overlay_file)) and overlay_file:
+                os.remove(overlay_file[0])  # The worker won't delete it
+
+        self.worker.submit(send_play)
+        return id
+
+    def stop(self, id: int) -> None:
+        self.worker.submit(lambda: self.process and self.send(("stop", id)))
+
+
+mpv_worker = MpvWorker()
+
 
 class VideoPlayer(Label):
     def __init__(self, master: Misc, settings: Settings, width: int, height: int) -> None:
@@ -37,59 +239,31 @@ class VideoPlayer(Label):
         self.pack()
 
         self.settings = settings
-        self.properties = {
-            "loop": "inf",
-            "hwdec": "auto" if self.settings.video_hardware_acceleration else "no",
-            "input-cursor-passthrough": "yes",  # Required for buttonless closing
-        }
-
-        if os_utils.is_linux():
-            # Required on Wayland for embedding the player
-            temp = mpv.MPV()
-            for context in ["x11", "x11egl", "x11vk"]:
-                try:
-                    temp["gpu-context"] = context  # Check if context is supported
-                    self.properties["gpu-context"] = context
-                    break
-                except TypeError:
-                    logging.warning(f"mpv GPU context {context} is not supported")
+        self.properties = {}  # Properties set by the popup, static properties are added by play
+        self.overlay = None
 
     def play(self, media: Path, overlay: Image.Image | None = None) -> None:
         if not self.settings.mpv_subprocess:
             self.wait_visibility()  # Needs to be visible for mpv to draw on it
 
-            self.mpv = mpv.MPV(wid=self.winfo_id())
+            self.mpv = mpv_pool.take(self.settings)
+            self.mpv["wid"] = self.winfo_id()
             for key, value in self.properties.items():
                 self.mpv[key] = value
 
             if overlay:
-                self.mpv.create_image_overlay().update(overlay)
+                self.overlay = self.mpv.create_image_overlay()
+                self.overlay.update(overlay)
 
             self.mpv.play(str(media))
         else:
-            self.process = subprocess.Popen(
-                [
-                    sys.executable,
-                    Process.MPV,
-                    str(self.winfo_id()),
-                    str(self.properties),
-                    media,
-                    "1" if overlay else "0",
-                ],
-                stdin=subprocess.PIPE,
-            )
-
-            if overlay:
-
-                def send_overlay() -> None:
-                    bytes_io = io.BytesIO()
-                    overlay.save(bytes_io, format="PNG")
-                    self.process.communicate(input=bytes_io.getvalue())
-
-                Thread(target=send_overlay).start()
+            properties = {**static_properties(self.settings), **self.properties}
+            self.worker_id = mpv_worker.play(self.winfo_id(), properties, media, overlay)
 
     def close(self) -> None:
         if not self.settings.mpv_subprocess:
-            close_mpv(self.mpv)
+            if self.overlay:
+                self.overlay.remove()
+            mpv_pool.give_back(self.mpv, self.properties)
         else:
-            self.process.kill()
+            mpv_worker.stop(self.worker_id)
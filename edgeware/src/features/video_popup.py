@@ -24,7 +24,6 @@ from features.popup import Popup
 from features.video_player import VideoPlayer
 from pack import Pack
 from state import State
-from videoprops import get_video_properties
 
 
 class VideoPopup(Popup):
@@ -34,10 +33,10 @@ class VideoPopup(Popup):
             return
         super().__init__(root, settings, pack, state, on_close)
 
-        properties = get_video_properties(self.media)
-        self.compute_geometry(properties["width"], properties["height"])
+        properties = self.pack.video_properties(self.media)
+        self.compute_geometry(properties.width, properties.height)
 
-        self.player = VideoPlayer(self, self.settings, self.width, self.height)
+        self.player = VideoPlayer(self.window, self.settings, self.width, self.height)
         self.player.properties["volume"] = self.settings.video_volume
         self.player.properties["glsl-shaders"] = self.try_denial_filter(True)
         self.player.play(self.media)
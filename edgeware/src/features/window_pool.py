@@ -0,0 +1,95 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+from tkinter import Button, Label, Tk, Toplevel
+from typing import Callable
+
+from os_utils import set_borderless
+
+WARM_INTERVAL = 50  # Milliseconds between creating windows when warming the pool
+
+
+class PopupWindow(Toplevel):
+    """
+    Borderless window shown by image and video popups. The image label and
+    close button are kept between popups, other widgets are destroyed when
+    the window is returned to the pool.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(bg="black")
+        self.withdraw()
+        self.attributes("-topmost", True)
+        set_borderless(self)
+
+        self.image_label = Label(self, bg="black")
+        self.button = Button(self)
+        self.scheduled: list[str] = []
+
+    def schedule(self, ms: int, func: Callable[[], None]) -> None:
+        """Like after, but cancelled when the window is returned to the pool"""
+        self.scheduled.append(self.after(ms, func))
+
+    def show(self, geometry: str) -> None:
+        self.geometry(geometry)
+        self.deiconify()
+        self.lift()  # Reused windows keep their old position in the stacking order
+
+    def reset(self) -> None:
+        self.withdraw()
+        for after_id in self.scheduled:
+            self.after_cancel(after_id)
+        self.scheduled = []
+
+        self.unbind("<KeyPress>")
+        self.unbind("<ButtonRelease-1>")
+        for child in self.winfo_children():
+            if child not in (self.image_label, self.button):
+                child.destroy()
+
+        self.image_label.config(image="")
+        self.image_label.pack_forget()
+        self.button.place_forget()
+
+
+class WindowPool:
+    """
+    Hidden popup windows ready to be shown, since creating and destroying
+    windows is expensive at high popup rates. Closed popups return their
+    windows to the pool until it's full. Tk isn't thread safe, so the pool is
+    warmed on the Tk thread one window at a time after startup.
+    """
+
+    def __init__(self, root: Tk, size: int) -> None:
+        self.root = root
+        self.size = size
+        self.windows: list[PopupWindow] = []
+
+    def warm(self) -> None:
+        if len(self.windows) < self.size:
+            self.windows.append(PopupWindow())
+            self.root.after(WARM_INTERVAL, self.warm)
+
+    def take(self) -> PopupWindow:
+        return self.windows.pop() if self.windows else PopupWindow()
+
+    def give_back(self, window: PopupWindow) -> None:
+        if len(self.windows) < self.size:
+            window.reset()
+            self.windows.append(window)
+        else:
+            window.destroy()
@@ -45,15 +45,21 @@ from tkinter import Tk
 import utils
 from config import first_launch_configure
 from config.settings import Settings
+from features.animator import Animator
 from features.audio import play_audio
 from features.corruption import corruption_danger_check, handle_corruption
 from features.drive import fill_drive, replace_images
 from features.hibernate import main_hibernate, start_main_hibernate
+from features.image_cache import ImageCache
 from features.image_popup import ImagePopup
+from features.image_prefetch import ImagePrefetcher
 from features.misc import (
     handle_discord,
     handle_keyboard,
     handle_mitosis_mode,
+    handle_monitor_refresh,
+    handle_mpv,
+    handle_pack_reload,
     handle_panic_lockout,
     handle_wallpaper,
     make_desktop_icons,
@@ -65,6 +71,7 @@ from features.prompt import Prompt
 from features.startup_splash import StartupSplash
 from features.subliminal_popup import SubliminalPopup
 from features.video_popup import VideoPopup
+from features.window_pool import WindowPool
 from pack import Pack
 from panic import start_panic_listener
 from roll import RollTarget, roll_targets
@@ -86,8 +93,12 @@ if __name__ == "__main__":
     root = Tk()
     root.withdraw()
     settings = Settings()
-    pack = Pack(settings.pack_path)
+    pack = Pack(settings.pack_path, lazy=True)
     state = State()
+    state.animator = Animator(root)
+    state.image_cache = ImageCache(settings.image_cache_size)
+    state.image_prefetcher = ImagePrefetcher(settings, pack, state.image_cache)
+    state.window_pool = WindowPool(root, settings.window_pool_size)
 
     settings.corruption_mode = settings.corruption_mode and pack.corruption_levels
     corruption_danger_check(settings, pack)
@@ -109,10 +120,16 @@ if __name__ == "__main__":
         handle_keyboard(root, settings, state)
         start_panic_listener(root, settings, state)
         Thread(target=lambda: replace_images(settings, pack), daemon=True).start()  # Thread for performance reasons
+        if settings.video_chance > 0:
+            pack.start_video_scan()
         handle_corruption(root, settings, pack, state)
         handle_discord(settings, pack)
         handle_panic_lockout(root, settings, state)
         handle_mitosis_mode(root, settings, pack, state)
+        handle_pack_reload(root, settings, pack)
+        handle_monitor_refresh(root)
+        handle_mpv(root, settings)
+        state.window_pool.warm()
         run_script(root, settings, pack, state)
 
         if settings.hibernate_mode:
@@ -122,7 +139,7 @@ if __name__ == "__main__":
             main(root, settings, pack, targets)
 
     if settings.startup_splash:
-        StartupSplash(settings, pack, start_main)
+        StartupSplash(settings, pack, state.animator, start_main)
     else:
         start_main()
 
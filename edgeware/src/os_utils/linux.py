@@ -21,6 +21,7 @@ import shlex
 import subprocess
 import sys
 from pathlib import Path
+from threading import Thread
 from tkinter import Toplevel
 from urllib.parse import urlparse
 
@@ -34,6 +35,7 @@ from os_utils.linux_utils import find_get_wallpaper_command, find_set_wallpaper_
 
 def close_mpv(player: mpv.MPV) -> None:
     player.stop()
+    Thread(target=player.terminate, daemon=True).start()  # Thread for performance reasons
 
 
 def set_borderless(window: Toplevel) -> None:
@@ -17,30 +17,45 @@
 
 import logging
 import random
+from collections.abc import Callable, Iterator
 from pathlib import Path
+from threading import Thread
 
 import filetype
 from paths import PATH, CustomAssets, PackPaths
 
-from pack.data import MoodBase, MoodSet
-from pack.load import list_media, load_allowed_moods, load_config, load_corruption, load_discord, load_index, load_info
+from pack.data import MoodBase, MoodSet, VideoProperties
+from pack.load import (
+    index_sources,
+    list_media,
+    load_allowed_moods,
+    load_config,
+    load_corruption_and_index,
+    load_discord,
+    load_info,
+    load_media_cache,
+    load_video_cache,
+    read_video_properties,
+    save_media_cache,
+    save_video_cache,
+    scan_media,
+)
+from pack.media import PackMedia, modification_times
+from pack.moods import TextPools
+
+VIDEO_SAVE_INTERVAL = 50  # Videos read between saving the video cache during a scan
 
 
 class Pack:
-    def __init__(self, root: Path) -> None:
+    def __init__(self, root: Path, lazy: bool = False) -> None:
         logging.info(f"Loading pack at {root.relative_to(PATH)}.")
 
         self.paths = PackPaths(root)
 
-        # Weights for randomization
-        self.image_ranks = {}
-        self.video_ranks = {}
-        self.audio_ranks = {}
-
-        # Pack files
-        self.corruption_levels = load_corruption(self.paths)
+        # Pack files, the index is reloaded if any of its sources change
+        self.index_times = modification_times(index_sources(self.paths))
+        self.corruption_levels, self.index = load_corruption_and_index(self.paths)
         self.discord = load_discord(self.paths)
-        self.index = load_index(self.paths)
         self.info = load_info(self.paths)
         self.config = load_config(self.paths)
 
@@ -50,11 +65,43 @@ class Pack:
         self.get_active_moods = lambda: self.active_moods
         self.block_corruption_moods()
 
-        # Media
-        self.images = list_media(self.paths.image, filetype.is_image)
-        self.videos = list_media(self.paths.video, filetype.is_video)
-        self.audio = list_media(self.paths.audio, filetype.is_audio)
-        self.hypnos = list_media(self.paths.hypno, filetype.is_image) or list_media(self.paths.hypno_legacy, filetype.is_image) or [CustomAssets.hypno()]
+        # Text, flattened per attribute for the active moods
+        self.text_pools = TextPools(self.index)
+
+        # Media, listed in the background in lazy mode. Videos and audio are
+        # only listed once they're needed for the first time.
+        media_cache = load_media_cache(self.paths)
+
+        def scan(dir: Path, is_valid: Callable[[str], bool]) -> Callable[[], Iterator[Path]]:
+            def media() -> Iterator[Path]:
+                yield from scan_media(dir, is_valid, media_cache)
+                save_media_cache(self.paths, media_cache)
+
+            return media
+
+        def scan_hypnos() -> list[Path]:
+            hypnos = (
+                list_media(self.paths.hypno, filetype.is_image, media_cache)
+                or list_media(self.paths.hypno_legacy, filetype.is_image, media_cache)
+                or [CustomAssets.hypno()]
+            )
+            save_media_cache(self.paths, media_cache)
+            return hypnos
+
+        self.image_media = PackMedia("images", scan(self.paths.image, filetype.is_image), self.find_media_mood_name, [self.paths.image])
+        self.video_media = PackMedia("videos", scan(self.paths.video, filetype.is_video), self.find_media_mood_name, [self.paths.video])
+        self.audio_media = PackMedia("audio files", scan(self.paths.audio, filetype.is_audio), self.find_media_mood_name, [self.paths.audio])
+        self.video_cache = load_video_cache(self.paths)
+        self.video_scan: Thread | None = None
+        self.hypno_media = PackMedia("hypnos", scan_hypnos, self.find_media_mood_name, [self.paths.hypno, self.paths.hypno_legacy])
+        self.all_media = [self.image_media, self.video_media, self.audio_media, self.hypno_media]
+
+        if lazy:
+            self.image_media.start()
+            self.hypno_media.start()
+        else:
+            for media in self.all_media:
+                media.wait()
 
         # Paths
         self.icon = self.paths.icon if self.paths.icon.is_file() else CustomAssets.icon()
@@ -63,56 +110,125 @@ class Pack:
 
         logging.info(f"Allowed moods: {self.allowed_moods}")
 
+    def reload(self, activate_new_moods: bool) -> Callable[[], None]:
+        """
+        Read changes made to the pack while Edgeware is running, only changed
+        index files and media directories are read again. Returns a function
+        applying the changes, which must be called on the thread selecting
+        media. Media that isn't listed yet and open popups are left as they
+        are. Corruption levels aren't reloaded.
+
+        Moods added to the index are allowed if the user hasn't chosen moods,
+        and made active if activate_new_moods is set.
+        """
+        index = None
+        index_times = modification_times(index_sources(self.paths))
+        if index_times != self.index_times:
+            self.index_times = index_times
+            _, index = load_corruption_and_index(self.paths)
+            chosen_moods = load_allowed_moods(self.info.mood_file) is not None
+
+        changes = [(media, media.scan_changes()) for media in self.all_media]
+
+        def apply() -> None:
+            if index:
+                new_moods = {mood.name for mood in index.moods} - {mood.name for mood in self.index.moods}
+                if new_moods and not chosen_moods:
+                    self.allowed_moods.update(new_moods)
+                    if activate_new_moods:
+                        self.active_moods.update(new_moods)
+
+                self.index = index
+                self.text_pools = TextPools(self.index)
+                logging.info(f"Reloaded index, new moods: {new_moods or 'none'}.")
+
+            for media, scanned in changes:
+                if scanned is not None:
+                    media.update(scanned)
+                elif index:
+                    media.regroup()
+
+        return apply
+
+    def video_properties(self, video: Path) -> VideoProperties:
+        """Usually cached by the scan, videos it hasn't reached yet are read here"""
+        properties = read_video_properties(video, self.video_cache)
+
+        # Saving on the Tk thread could block, videos read here are saved by
+        # the scan. If it isn't running, it's started, which only runs ffprobe
+        # for videos that aren't cached yet.
+        if self.video_cache.changed and not (self.video_scan and self.video_scan.is_alive()):
+            self.start_video_scan()
+        return properties
+
+    def start_video_scan(self) -> None:
+        """Read the properties of all videos in the background so that video popups don't have to run ffprobe"""
+        self.video_scan = Thread(target=self.scan_video_properties, daemon=True)
+        self.video_scan.start()
+
+    def scan_video_properties(self) -> None:
+        # Images are listed first so that the first image popup isn't delayed
+        self.image_media.wait()
+        for n, video in enumerate(self.videos, start=1):
+            try:
+                read_video_properties(video, self.video_cache)
+            except Exception as e:
+                logging.warning(f"Failed to read properties of {video.name}. Reason: {e}")
+
+            if n % VIDEO_SAVE_INTERVAL == 0:
+                save_video_cache(self.paths, self.video_cache)
+
+        save_video_cache(self.paths, self.video_cache)
+        logging.info(f"Video properties read for {len(self.video_cache.videos)} videos.")
+
     def block_corruption_moods(self) -> None:
         # Remove moods that aren't enabled by the user from each corruption level
         for level in self.corruption_levels:
             level.added_moods.intersection_update(self.allowed_moods)
             level.removed_moods.intersection_update(self.allowed_moods)
 
-    def filter_media(self, media_list: list[Path]) -> list[Path]:
-        active_moods = self.get_active_moods()
-        return list(filter(lambda media: self.index.media_moods.get(media.name) in active_moods, media_list))
+    @property
+    def images(self) -> list[Path]:
+        return self.image_media.media
 
-    def random_media(self, media_list: list[Path], media_ranks: dict[Path, int]) -> Path | None:
-        filtered = self.filter_media(media_list)
-        if not filtered:
-            return None
+    @property
+    def videos(self) -> list[Path]:
+        return self.video_media.media
 
-        # Give lower preference to media that has been recently selected
-        max_rank = len(media_list)
-        ranks = [media_ranks.get(media, max_rank) for media in filtered]
-        weights = [2 ** (16 * rank / max_rank) for rank in ranks]
-        media = random.choices(filtered, weights, k=1)[0]
+    @property
+    def audio(self) -> list[Path]:
+        return self.audio_media.media
 
-        for key, value in media_ranks.items():
-            media_ranks[key] = min(value + 1, max_rank)
-        media_ranks[media] = 1
+    @property
+    def hypnos(self) -> list[Path]:
+        return self.hypno_media.media
 
-        return media
+    def find_media_mood_name(self, media: Path) -> str | None:
+        return self.index.media_moods.get(media.name)
 
     def random_image(self, unweighted: bool = False) -> Path | None:
-        if unweighted:
-            images = self.filter_media(self.images)
-            return random.choice(images) if images else None
-        return self.random_media(self.images, self.image_ranks)
+        return self.image_media.random(self.get_active_moods(), not unweighted)
+
+    def image_draw(self, media: Path) -> int | None:
+        return self.image_media.last_draw(media)
+
+    def unselect_image(self, media: Path, draw: int) -> None:
+        self.image_media.unselect(media, draw)
 
     def random_video(self) -> Path | None:
-        return self.random_media(self.videos, self.video_ranks)
+        return self.video_media.random(self.get_active_moods())
 
     def random_audio(self) -> Path | None:
-        return self.random_media(self.audio, self.audio_ranks)
+        return self.audio_media.random(self.get_active_moods())
 
     def random_hypno(self) -> Path:
         return random.choice(self.hypnos)  # Guaranteed to be non-empty
 
     def find_list(self, attr: str) -> list:
-        active_moods = self.get_active_moods()
-        moods = list(filter(lambda mood: mood.name in active_moods, self.index.moods))
-        lists = [getattr(self.index.default, attr)] + list(map(lambda mood: getattr(mood, attr), moods))
-        return [item for list in lists for item in list]
+        return self.text_pools.find(attr, self.get_active_moods())
 
     def find_media_mood(self, media: Path) -> MoodBase:
-        return next((mood for mood in self.index.moods if mood.name == self.index.media_moods.get(media.name)), None) or self.index.default
+        return self.index.find_media_mood(media.name)
 
     def find_captions(self, media: Path | None = None) -> list[str]:
         return (self.find_media_mood(media).captions or self.index.default.captions) if media else self.find_list("captions")
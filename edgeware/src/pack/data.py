@@ -15,18 +15,79 @@
 # You should have received a copy of the GNU General Public License
 # along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
 
+from collections.abc import Iterable
+from collections.abc import Set as AbstractSet
 from dataclasses import dataclass, field
 from pathlib import Path
+from threading import Lock
 
 
-# "mood in set" additionally return True if "mood" is the default one
+# "mood in set" additionally return True if "mood" is the default one.
+# The version is incremented on every modification so that anything derived
+# from the set can be cached until it changes.
 class MoodSet(set[str]):
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.version = 0
+
     def __contains__(self, o: object) -> bool:
         return o is None or super().__contains__(o)
 
     def copy(self) -> object:
         return MoodSet(super().copy())
 
+    def add(self, mood: str) -> None:
+        self.version += 1
+        super().add(mood)
+
+    def clear(self) -> None:
+        self.version += 1
+        super().clear()
+
+    def discard(self, mood: str) -> None:
+        self.version += 1
+        super().discard(mood)
+
+    def pop(self) -> str:
+        self.version += 1
+        return super().pop()
+
+    def remove(self, mood: str) -> None:
+        self.version += 1
+        super().remove(mood)
+
+    def update(self, *others: Iterable[str]) -> None:
+        self.version += 1
+        super().update(*others)
+
+    def difference_update(self, *others: Iterable[str]) -> None:
+        self.version += 1
+        super().difference_update(*others)
+
+    def intersection_update(self, *others: Iterable[str]) -> None:
+        self.version += 1
+        super().intersection_update(*others)
+
+    def symmetric_difference_update(self, other: Iterable[str]) -> None:
+        self.version += 1
+        super().symmetric_difference_update(other)
+
+    def __ior__(self, other: AbstractSet[str]) -> "MoodSet":
+        self.version += 1
+        return super().__ior__(other)
+
+    def __iand__(self, other: AbstractSet[str]) -> "MoodSet":
+        self.version += 1
+        return super().__iand__(other)
+
+    def __isub__(self, other: AbstractSet[str]) -> "MoodSet":
+        self.version += 1
+        return super().__isub__(other)
+
+    def __ixor__(self, other: AbstractSet[str]) -> "MoodSet":
+        self.version += 1
+        return super().__ixor__(other)
+
 
 @dataclass
 class CorruptionLevel:
@@ -79,6 +140,50 @@ class Index:
     moods: list[Mood] = field(default_factory=list)
     media_moods: dict[str, str] = field(default_factory=dict)
 
+    # Lookup tables built from the fields above
+    mood_names: dict[str, Mood] = field(init=False, repr=False, compare=False)
+    media_mood_cache: dict[str, Mood] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.build_lookups()
+
+    def build_lookups(self) -> None:
+        """Must be called after modifying moods or media_moods"""
+        self.mood_names = {mood.name: mood for mood in self.moods}
+        self.media_mood_cache = {media: self.mood_names[mood] for media, mood in self.media_moods.items() if mood in self.mood_names}
+
+    def find_mood(self, name: str | None) -> Mood | None:
+        return self.mood_names.get(name)
+
+    def find_media_mood(self, media_name: str) -> MoodBase:
+        return self.media_mood_cache.get(media_name) or self.default
+
+
+# Maps directory name -> file name -> [size, mtime, valid], used to avoid
+# reading the header of every media file on each launch
+@dataclass
+class MediaCache:
+    media: dict[str, dict[str, list[int | bool]]] = field(default_factory=dict)
+    changed: bool = False
+    lock: Lock = field(default_factory=Lock, repr=False, compare=False)  # Directories may be listed concurrently
+
+
+@dataclass
+class VideoProperties:
+    width: int
+    height: int
+    duration: float  # Seconds
+    codec: str
+
+
+# Maps video path -> [size, mtime, width, height, duration, codec], used to
+# avoid running ffprobe whenever a video popup is opened
+@dataclass
+class VideoCache:
+    videos: dict[str, list[int | float | str]] = field(default_factory=dict)
+    changed: bool = False
+    lock: Lock = field(default_factory=Lock, repr=False, compare=False)  # Filled by a background scan
+
 
 @dataclass
 class Info:
@@ -18,21 +18,27 @@
 import json
 import logging
 import os
-from collections.abc import Callable
-from dataclasses import asdict
+import pickle
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, astuple
+from hashlib import md5
 from json.decoder import JSONDecodeError
 from pathlib import Path
 from typing import TypeVar
 
 import utils
 from paths import Data, PackPaths
+from videoprops import get_video_properties
 from voluptuous import ALLOW_EXTRA, PREVENT_EXTRA, All, Any, Equal, In, Length, Number, Optional, Range, Required, Schema, Url
 from voluptuous.error import Invalid
 
-from pack.data import CorruptionLevel, Default, Discord, Index, Info, Mood, MoodBase, MoodSet, Web
+from pack.data import CorruptionLevel, Default, Discord, Index, Info, MediaCache, Mood, MoodBase, MoodSet, VideoCache, VideoProperties, Web
 
 T = TypeVar("T")
 
+# Increment when the pack data classes change in a way that breaks old snapshots
+SNAPSHOT_VERSION = 1
+
 
 def try_load(path: Path, load: Callable[[str], T]) -> T | None:
     try:
@@ -92,6 +98,52 @@ def load_corruption(paths: PackPaths) -> list[CorruptionLevel]:
     return try_load(paths.corruption, load) or []
 
 
+def index_sources(paths: PackPaths) -> list[Path]:
+    return [paths.corruption, paths.index, paths.media, paths.captions, paths.prompt, paths.web]
+
+
+def source_hash(paths: PackPaths) -> str:
+    sources = md5()
+    for path in index_sources(paths):
+        try:
+            sources.update(path.read_bytes())
+        except OSError:
+            sources.update(b"\0")  # Missing files must also produce different hashes
+        sources.update(path.name.encode())
+    return sources.hexdigest()
+
+
+def load_corruption_and_index(paths: PackPaths) -> tuple[list[CorruptionLevel], Index]:
+    """
+    Validating and converting the JSON files is slow for large packs, so the
+    result is stored and reused until any of the source files change.
+    """
+
+    key = source_hash(paths)
+    try:
+        with open(paths.snapshot, "rb") as f:
+            snapshot = pickle.load(f)
+        if snapshot["version"] == SNAPSHOT_VERSION and snapshot["key"] == key:
+            logging.info(f"{paths.snapshot.name} loaded successfully, index and corruption unchanged.")
+            return snapshot["corruption"], snapshot["index"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning(f"{paths.snapshot.name} could not be loaded. Reason: {e}")
+
+    corruption = load_corruption(paths)
+    index = load_index(paths)
+
+    try:
+        paths.cache.mkdir(parents=True, exist_ok=True)
+        with open(paths.snapshot, "wb") as f:
+            pickle.dump({"version": SNAPSHOT_VERSION, "key": key, "corruption": corruption, "index": index}, f)
+    except Exception as e:
+        logging.warning(f"Failed to save {paths.snapshot.name}. Reason: {e}")
+
+    return corruption, index
+
+
 def load_discord(paths: PackPaths) -> Discord:
     default = Discord()
 
@@ -229,8 +281,112 @@ def load_allowed_moods(mood_file: Path) -> MoodSet | None:
     return try_load(mood_file, load)
 
 
-def list_media(dir: Path, is_valid: Callable[[str], bool]) -> list[Path]:
-    return [(dir / file) for file in os.listdir(dir) if is_valid(dir / file)] if dir.is_dir() else []
+def load_media_cache(paths: PackPaths) -> MediaCache:
+    def load(content: str) -> MediaCache:
+        cache = json.loads(content)
+        Schema({str: dict})(cache)
+        return MediaCache(cache)
+
+    return try_load(paths.media_cache, load) or MediaCache()
+
+
+def save_media_cache(paths: PackPaths, cache: MediaCache) -> None:
+    with cache.lock:
+        if not cache.changed:
+            return
+
+        try:
+            paths.cache.mkdir(parents=True, exist_ok=True)
+            with open(paths.media_cache, "w") as f:
+                f.write(json.dumps(cache.media))
+            cache.changed = False
+        except OSError as e:
+            logging.warning(f"Failed to save media cache. Reason: {e}")
+
+
+def load_video_cache(paths: PackPaths) -> VideoCache:
+    def load(content: str) -> VideoCache:
+        cache = json.loads(content)
+        Schema({str: [Any(int, float, str)]})(cache)
+        return VideoCache(cache)
+
+    return try_load(paths.video_cache, load) or VideoCache()
+
+
+def save_video_cache(paths: PackPaths, cache: VideoCache) -> None:
+    with cache.lock:
+        if not cache.changed:
+            return
+
+        try:
+            paths.cache.mkdir(parents=True, exist_ok=True)
+            with open(paths.video_cache, "w") as f:
+                f.write(json.dumps(cache.videos))
+            cache.changed = False
+        except OSError as e:
+            logging.warning(f"Failed to save video cache. Reason: {e}")
+
+
+def read_video_properties(video: Path, cache: VideoCache) -> VideoProperties:
+    """Properties of a video, ffprobe is only run if the video is new or has been modified"""
+    stat = video.stat()
+    key = [stat.st_size, stat.st_mtime_ns]
+    with cache.lock:
+        cached = cache.videos.get(str(video))
+
+    if cached and cached[:2] == key:
+        return VideoProperties(*cached[2:])
+
+    properties = get_video_properties(video)
+    try:
+        duration = float(properties["duration"])
+    except (KeyError, ValueError):
+        duration = 0.0  # Not known for every format
+    result = VideoProperties(int(properties["width"]), int(properties["height"]), duration, properties.get("codec_name", ""))
+
+    with cache.lock:
+        cache.videos[str(video)] = key + list(astuple(result))
+        cache.changed = True
+    return result
+
+
+def scan_media(dir: Path, is_valid: Callable[[str], bool], cache: MediaCache | None = None) -> Iterator[Path]:
+    if not dir.is_dir():
+        return
+
+    if cache is None:
+        yield from ((dir / file) for file in os.listdir(dir) if is_valid(dir / file))
+        return
+
+    # Only sniff the file type of files that are new or have been modified
+    # since the previous scan, everything else is taken from the cache
+    cached = cache.media.get(dir.name, {})
+    scanned = {}
+    with os.scandir(dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+
+            stat = entry.stat()
+            key = [stat.st_size, stat.st_mtime_ns]
+            entry_cache = cached.get(entry.name)
+            try:
+                valid = entry_cache[2] if entry_cache[:2] == key else is_valid(dir / entry.name)
+            except (IndexError, TypeError):
+                valid = is_valid(dir / entry.name)
+
+            scanned[entry.name] = key + [bool(valid)]
+            if valid:
+                yield dir / entry.name
+
+    if scanned != cached:
+        with cache.lock:
+            cache.media[dir.name] = scanned
+            cache.changed = True
+
+
+def list_media(dir: Path, is_valid: Callable[[str], bool], cache: MediaCache | None = None) -> list[Path]:
+    return list(scan_media(dir, is_valid, cache))
 
 
 def load_index_fallback(paths: PackPaths) -> Index:
@@ -243,10 +399,11 @@ def load_index_fallback(paths: PackPaths) -> Index:
     web = load_web(paths)
 
     def get_or_add_mood(name: str) -> Mood:
-        mood = next((mood for mood in index.moods if mood.name == name), None)
+        mood = index.find_mood(name)
         if not mood:
             mood = Mood(name=name)
             index.moods.append(mood)
+            index.mood_names[name] = mood
         return mood
 
     # Media
@@ -292,6 +449,7 @@ def load_index_fallback(paths: PackPaths) -> Index:
         else:
             get_or_add_mood(mood_name).web.append(web_url)
 
+    index.build_lookups()
     return index
 
 
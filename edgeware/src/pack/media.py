@@ -0,0 +1,147 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import random
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from pathlib import Path
+from threading import RLock
+
+import utils
+
+from pack.data import MoodSet
+from pack.sampler import MoodGroups, RecencySampler
+
+
+def modification_times(paths: list[Path]) -> list[tuple[int, int] | None]:
+    """Used to detect changes to files or directories without reading them"""
+    times = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            times.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            times.append(None)
+    return times
+
+
+class PackMedia:
+    """
+    Media of one type found in a pack. The media can be listed immediately,
+    in the background using start, or on first use. While it's being listed
+    in the background, the media found so far can already be selected. Once
+    listed, the media is scanned again if any of its directories change.
+    """
+
+    def __init__(self, name: str, scan: Callable[[], Iterable[Path]], find_mood: Callable[[Path], str | None], dirs: list[Path]) -> None:
+        self.name = name
+        self.scan = scan
+        self.find_mood = find_mood
+        self.dirs = dirs
+
+        self.partial: list[Path] = []
+        self.loaded = False
+        self.future: Future | None = None
+        self.lock = RLock()
+
+    def load(self) -> None:
+        # Recorded before scanning so that changes made during it are noticed
+        self.times = modification_times(self.dirs)
+        for path in self.scan():
+            self.partial.append(path)
+
+        self.moods = MoodGroups(self.partial, self.find_mood)
+        self.sampler = RecencySampler(self.moods)
+        self.loaded = True
+        logging.info(f"Found {len(self.partial)} {self.name}.")
+
+    def scan_changes(self) -> list[Path] | None:
+        """Scan the media again if its directories have changed, returns the media if any was added or removed"""
+        if not self.loaded:
+            return None
+
+        times = modification_times(self.dirs)
+        if times == self.times:
+            return None
+        self.times = times
+
+        media = list(self.scan())
+        added = len(set(media) - set(self.partial))
+        removed = len(set(self.partial) - set(media))
+        if added or removed:
+            logging.info(f"Reloaded {self.name}, {added} added and {removed} removed.")
+            return media
+        return None
+
+    def regroup(self) -> None:
+        """Must be called after the moods of the media have changed"""
+        if self.loaded:
+            self.update(self.partial)
+
+    def update(self, media: list[Path]) -> None:
+        """Must be called on the thread selecting media, the sampler isn't thread safe"""
+        moods = MoodGroups(media, self.find_mood)
+        self.sampler = self.sampler.rebuild(moods)
+        self.moods = moods
+        self.partial = media
+
+    def start(self) -> None:
+        with self.lock:
+            if self.future is None:
+                self.future = utils.run_in_thread(self.load)
+
+    def wait(self) -> None:
+        with self.lock:
+            if self.future is None:
+                self.future = Future()
+                try:
+                    self.load()
+                    self.future.set_result(None)
+                except Exception as e:
+                    self.future.set_exception(e)
+        self.future.result()
+
+    @property
+    def media(self) -> list[Path]:
+        self.wait()
+        return self.partial
+
+    def random(self, active_moods: MoodSet, weighted: bool = True) -> Path | None:
+        if not self.loaded:
+            if self.future is None or self.future.done():
+                self.wait()
+            else:
+                # Still being listed in the background, the recency weights
+                # only become available once every file is known
+                available = [path for path in self.partial if self.find_mood(path) in active_moods]
+                return random.choice(available) if available else None
+
+        if weighted:
+            # Give lower preference to media that has been recently selected
+            return self.sampler.sample(active_moods)
+
+        media = self.moods.active(active_moods)
+        return random.choice(media) if media else None
+
+    def last_draw(self, media: Path) -> int | None:
+        """Draw number of the last weighted selection of media"""
+        return self.sampler.last_draw.get(media) if self.loaded else None
+
+    def unselect(self, media: Path, draw: int) -> None:
+        if self.loaded and media in self.sampler.locations:
+            self.sampler.unselect(media, draw)
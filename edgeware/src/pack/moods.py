@@ -0,0 +1,78 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+from collections.abc import Iterable
+
+from pack.data import Index
+
+
+class ActiveMoods:
+    """
+    The subset of some moods that is active. Checking every mood is only
+    done when the set of active moods is a different object or has been
+    modified, sets without a version are always checked.
+    """
+
+    def __init__(self, moods: Iterable[str | None]) -> None:
+        self.moods = list(moods)
+        self.active_moods: set[str] | None = None
+        self.version = -1
+        self.key: frozenset[str | None] = frozenset()
+
+    def update(self, active_moods: set[str]) -> bool:
+        """Returns True if the active subset has changed"""
+        version = getattr(active_moods, "version", -1)
+        if active_moods is self.active_moods and version == self.version and version != -1:
+            return False
+
+        self.active_moods = active_moods
+        self.version = version
+        key = frozenset(mood for mood in self.moods if mood in active_moods)
+        changed = key != self.key
+        self.key = key
+        return changed
+
+
+class TextPools:
+    """
+    Flattened lists of the text attributes (captions, prompts, etc.) of the
+    default mood and the active moods, memoized until the active moods change.
+    """
+
+    def __init__(self, index: Index) -> None:
+        self.index = index
+        self.pools: dict[frozenset[str], dict[str, list]] = {}
+        self.active = ActiveMoods(mood.name for mood in index.moods)
+
+    def find(self, attr: str, active_moods: set[str]) -> list:
+        self.active.update(active_moods)
+        key = self.active.key
+
+        pools = self.pools.get(key)
+        if pools is None:
+            if len(self.pools) >= 8:
+                self.pools.clear()
+            pools = {}
+            self.pools[key] = pools
+
+        pool = pools.get(attr)
+        if pool is None:
+            moods = filter(lambda mood: mood.name in key, self.index.moods)
+            lists = [getattr(self.index.default, attr)] + list(map(lambda mood: getattr(mood, attr), moods))
+            pool = [item for list in lists for item in list]
+            pools[attr] = pool
+        return pool
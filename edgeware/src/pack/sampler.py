@@ -0,0 +1,270 @@
+# Copyright (C) 2025 Araten & Marigold
+#
+# This file is part of Edgeware++.
+#
+# Edgeware++ is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Edgeware++ is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
+
+import random
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+from pack.data import MoodSet
+from pack.moods import ActiveMoods
+
+# Media that hasn't been selected in the last len(media) draws has the weight
+# 2 ** RECENCY_EXPONENT, selecting media resets its weight to the minimum
+RECENCY_EXPONENT = 16
+
+
+class FenwickTree:
+    def __init__(self, values: list[float]) -> None:
+        self.values = values.copy()
+        self.tree = [0.0] + values
+        for i in range(1, len(self.tree)):
+            parent = i + (i & -i)
+            if parent < len(self.tree):
+                self.tree[parent] += self.tree[i]
+
+    def set(self, index: int, value: float) -> None:
+        delta = value - self.values[index]
+        self.values[index] = value
+
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> float:
+        """Sum of the values before index"""
+        total = 0.0
+        i = index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def total(self) -> float:
+        return self.prefix(len(self.values))
+
+    def find(self, target: float) -> int:
+        """Return the first index where the prefix sum of values exceeds target"""
+        index = 0
+        step = 1 << (len(self.values).bit_length() - 1) if self.values else 0
+        while step:
+            next = index + step
+            if next < len(self.tree) and self.tree[next] <= target:
+                index = next
+                target -= self.tree[next]
+            step >>= 1
+        return min(index, len(self.values) - 1)
+
+
+class MoodGroups:
+    """
+    Media grouped by mood once when the pack is loaded. The list of media
+    belonging to the active moods is only recomputed when the active moods
+    change, not on every draw.
+    """
+
+    def __init__(self, media: list[Path], find_mood: Callable[[Path], str | None]) -> None:
+        self.media = media
+        self.groups: dict[str | None, list[Path]] = {}
+        for path in media:
+            self.groups.setdefault(find_mood(path), []).append(path)
+
+        self.views: dict[frozenset[str | None], list[Path]] = {}
+        self.active_groups = ActiveMoods(self.groups)
+
+    def active(self, active_moods: MoodSet) -> list[Path]:
+        self.active_groups.update(active_moods)
+        key = self.active_groups.key
+        view = self.views.get(key)
+        if view is None:
+            # Corruption fade alternates between a few sets, more are unlikely
+            if len(self.views) >= 8:
+                self.views.clear()
+            view = [path for mood, paths in self.groups.items() if mood in key for path in paths]
+            self.views[key] = view
+        return view
+
+
+class MediaGroup:
+    def __init__(self, mood: str | None, number: int, media: list[Path]) -> None:
+        self.mood = mood
+        self.number = number  # Index in the trees of group totals
+        self.media = media
+
+        # Media selected during the last len(media) draws is weighted by
+        # scale * recent.values[i] where scale is shared by all groups, other
+        # media has the constant weight 2 ** RECENCY_EXPONENT
+        self.recent = FenwickTree([0.0] * len(media))
+        self.settled = FenwickTree([1.0] * len(media))
+
+
+class RecencySampler:
+    """
+    Weighted random selection giving lower preference to recently selected
+    media. Media selected n draws ago has the weight 2 ** (16 * n / N) where N
+    is the total number of media, media that hasn't been selected in the last
+    N draws has the weight 2 ** 16. Sampling is done per mood group so that
+    the active moods can change between draws without rebuilding anything.
+    The totals of the active groups are kept in trees of their own, so a draw
+    doesn't depend on the number of groups either.
+    """
+
+    def __init__(self, mood_groups: MoodGroups) -> None:
+        self.max_rank = len(mood_groups.media)
+        self.draws = 0
+        self.base = 0  # Draw number the recent weights are relative to
+
+        self.groups = {mood: MediaGroup(mood, number, paths) for number, (mood, paths) in enumerate(mood_groups.groups.items())}
+        self.locations = {path: (group, index) for group in self.groups.values() for index, path in enumerate(group.media)}
+        self.group_list = list(self.groups.values())
+
+        # Totals of the recent and settled trees of each group, 0 for inactive groups
+        self.active = ActiveMoods(self.groups)
+        self.recent_totals = FenwickTree([0.0] * len(self.groups))
+        self.settled_totals = FenwickTree([0.0] * len(self.groups))
+
+        self.last_draw: dict[Path, int] = {}
+        self.previous_draw: dict[Path, int] = {}  # Selection before the last one if it hasn't settled, used by unselect
+        self.history: deque[tuple[Path, int]] = deque()
+
+    def rebuild(self, mood_groups: MoodGroups) -> "RecencySampler":
+        """Create a sampler for changed media, keeping the weights of media that still exists"""
+        sampler = RecencySampler(mood_groups)
+        sampler.draws = self.draws
+        sampler.base = self.draws
+
+        for media, draw in sorted(self.last_draw.items(), key=lambda item: item[1]):
+            if media in sampler.locations:
+                group, index = sampler.locations[media]
+                group.settled.set(index, 0.0)
+                group.recent.set(index, sampler.relative_weight(draw))
+                sampler.last_draw[media] = draw
+                sampler.history.append((media, draw))
+                if media in self.previous_draw:
+                    sampler.previous_draw[media] = self.previous_draw[media]
+
+        return sampler
+
+    def update_totals(self, group: MediaGroup) -> None:
+        if group.mood in self.active.key:
+            self.recent_totals.set(group.number, group.recent.total())
+            self.settled_totals.set(group.number, group.settled.total())
+
+    def rebuild_totals(self) -> None:
+        recent = []
+        settled = []
+        for group in self.group_list:
+            active = group.mood in self.active.key
+            recent.append(group.recent.total() if active else 0.0)
+            settled.append(group.settled.total() if active else 0.0)
+        self.recent_totals = FenwickTree(recent)
+        self.settled_totals = FenwickTree(settled)
+
+    def relative_weight(self, draw: int) -> float:
+        return 2 ** (RECENCY_EXPONENT * (self.base - draw) / self.max_rank)
+
+    def settle(self) -> None:
+        # Media selected max_rank or more draws ago has reached the maximum
+        # weight, history entries of media that was selected again are skipped
+        while self.history and self.draws - self.history[0][1] >= self.max_rank:
+            media, draw = self.history.popleft()
+            if self.last_draw.get(media) != draw:
+                continue
+
+            del self.last_draw[media]
+            self.previous_draw.pop(media, None)
+            group, index = self.locations[media]
+            group.recent.set(index, 0.0)
+            group.settled.set(index, 1.0)
+            self.update_totals(group)
+
+        # Keep the relative weights within a reasonable floating point range,
+        # this also discards any rounding errors accumulated in the trees
+        if self.draws - self.base >= self.max_rank:
+            self.base = self.draws
+            for group in self.groups.values():
+                values = [0.0] * len(group.media)
+                for index, media in enumerate(group.media):
+                    if media in self.last_draw:
+                        values[index] = self.relative_weight(self.last_draw[media])
+                group.recent = FenwickTree(values)
+            self.rebuild_totals()
+
+    def sample(self, active_moods: MoodSet) -> Path | None:
+        if not self.max_rank:
+            return None
+
+        if self.active.update(active_moods):
+            self.rebuild_totals()
+        self.settle()
+
+        recent_scale = 2 ** (RECENCY_EXPONENT * (self.draws - self.base) / self.max_rank)
+        settled_scale = 2**RECENCY_EXPONENT
+        recent = recent_scale * self.recent_totals.total()
+        settled = settled_scale * self.settled_totals.total()
+        if recent + settled <= 0:
+            return None
+
+        target = random.random() * (recent + settled)
+        if target < recent:
+            totals, target, tree = self.recent_totals, target / recent_scale, "recent"
+        else:
+            totals, target, tree = self.settled_totals, (target - recent) / settled_scale, "settled"
+
+        # Rounding may land on an inactive group at the very end
+        number = totals.find(target)
+        while number > 0 and not totals.values[number]:
+            number -= 1
+
+        group = self.group_list[number]
+        return self.select(group, getattr(group, tree).find(target - totals.prefix(number)))
+
+    def select(self, group: MediaGroup, index: int) -> Path:
+        media = group.media[index]
+
+        group.settled.set(index, 0.0)
+        group.recent.set(index, self.relative_weight(self.draws))
+
+        self.update_totals(group)
+
+        if media in self.last_draw:
+            self.previous_draw[media] = self.last_draw[media]
+        else:
+            self.previous_draw.pop(media, None)
+        self.last_draw[media] = self.draws
+        self.history.append((media, self.draws))
+        self.draws += 1
+
+        return media
+
+    def unselect(self, media: Path, draw: int) -> None:
+        """Undo selecting media that was never shown, unless it has been selected again since the given draw"""
+        if self.last_draw.get(media) != draw:
+            return
+
+        group, index = self.locations[media]
+        previous = self.previous_draw.pop(media, None)
+        if previous is None or self.draws - previous >= self.max_rank:
+            # The history entry of the undone draw is skipped by settle
+            del self.last_draw[media]
+            group.recent.set(index, 0.0)
+            group.settled.set(index, 1.0)
+        else:
+            self.last_draw[media] = previous
+            group.recent.set(index, self.relative_weight(previous))
+        self.update_totals(group)
@@ -16,6 +16,7 @@
 # along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
 
 from dataclasses import dataclass
+from hashlib import md5
 from pathlib import Path
 
 PATH = Path(__file__).parent.parent
@@ -26,6 +27,7 @@ DEFAULT_PACK_PATH = PATH / "resource"
 class Process:
     ROOT = PATH / "src"
 
+    BENCHMARK = ROOT / "benchmark.py"
     CONFIG = ROOT / "main_config.py"
     MAIN = ROOT / "main_edgeware.py"
     PANIC = ROOT / "panic.py"
@@ -73,6 +75,7 @@ class Data:
 
     # Directories
     BACKUPS = ROOT / "backups"
+    CACHE = ROOT / "cache"
     LOGS = ROOT / "logs"
     MOODS = ROOT / "moods"
     PACKS = ROOT / "packs"
@@ -145,3 +148,10 @@ class PackPaths:
         self.media = self.root / "media.json"
         self.prompt = self.root / "prompt.json"
         self.web = self.root / "web.json"
+
+        # Caches stored outside of the pack, one directory per pack location
+        self.cache = Data.CACHE / md5(str(self.root.absolute()).encode()).hexdigest()
+        self.media_cache = self.cache / "media_types.json"
+        self.video_cache = self.cache / "video_properties.json"
+        self.mood_id_cache = self.cache / "mood_id.json"
+        self.snapshot = self.cache / "snapshot.pickle"
@@ -18,14 +18,24 @@
 import multiprocessing
 from collections.abc import Callable
 from dataclasses import dataclass, field
-from tkinter import Toplevel
 from typing import Any
 
 import pyglet
 import pystray
+from features.animator import Animator
+from features.image_cache import ImageCache
+from features.placement import PopupRects
 
 
-class Popup(Toplevel):  # Circular
+class Popup:  # Circular
+    pass
+
+
+class ImagePrefetcher:  # Circular
+    pass
+
+
+class WindowPool:  # Circular
     pass
 
 
@@ -51,6 +61,7 @@ class State:
 
     audio_players: list[pyglet.media.Player] = field(default_factory=list)
     popups: list[Popup] = field(default_factory=list)
+    popup_rects: PopupRects = field(default_factory=PopupRects)
 
     panic_lockout_active = False
 
@@ -65,6 +76,11 @@ class State:
 
     tray: pystray.Icon | None = None
 
+    animator: Animator | None = None
+    image_cache: ImageCache | None = None
+    image_prefetcher: ImagePrefetcher | None = None
+    window_pool: WindowPool | None = None
+
     keyboard_process: multiprocessing.Process | None = None
     alt_held = False
 
@@ -16,12 +16,17 @@
 # along with Edgeware++.  If not, see <https://www.gnu.org/licenses/>.
 
 import getpass
+import json
 import logging
 import os
 import random
 import sys
 import time
+from collections.abc import Callable
+from concurrent.futures import Future
 from hashlib import md5
+from queue import SimpleQueue
+from threading import Thread
 
 from config.settings import Settings
 from paths import Data, PackPaths
@@ -34,6 +39,47 @@ class RedactUsernameFormatter(logging.Formatter):
         return message.replace(getpass.getuser(), "[USERNAME_REDACTED]")
 
 
+def run_future(future: Future, function: Callable[[], object]) -> None:
+    if future.set_running_or_notify_cancel():
+        try:
+            future.set_result(function())
+        except Exception as e:
+            future.set_exception(e)
+
+
+def run_in_thread(function: Callable[[], object]) -> Future:
+    """
+    Like submitting to a ThreadPoolExecutor, but the thread is a daemon.
+    Executor threads are joined at exit, which would make a panic wait for
+    the function to finish.
+    """
+    future = Future()
+    Thread(target=lambda: run_future(future, function), daemon=True).start()
+    return future
+
+
+class DaemonWorker:
+    """Runs submitted functions one at a time in order on a daemon thread, see run_in_thread"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.queue: SimpleQueue[tuple[Future, Callable[[], object]]] = SimpleQueue()
+        self.started = False
+
+    def submit(self, function: Callable[..., object], *args: object) -> Future:
+        if not self.started:
+            Thread(target=self.run, name=self.name, daemon=True).start()
+            self.started = True
+
+        future = Future()
+        self.queue.put((future, lambda: function(*args)))
+        return future
+
+    def run(self) -> None:
+        while True:
+            run_future(*self.queue.get())
+
+
 def init_logging(filename: str) -> str:
     Data.LOGS.mkdir(parents=True, exist_ok=True)
     log_time = time.asctime().replace(" ", "_").replace(":", "-")
@@ -50,20 +96,100 @@ def init_logging(filename: str) -> str:
 
 
 def compute_mood_id(paths: PackPaths) -> str:
+    try:
+        with open(paths.mood_id_cache) as f:
+            cache = json.loads(f.read())
+    except (OSError, ValueError):
+        cache = {}
+
+    # Equivalent to listing every directory with os.walk, but directories
+    # whose modification time hasn't changed are taken from the cache. Only
+    # adding, removing or renaming entries changes the modification time of a
+    # directory, which are the only changes that can affect the ID.
     data = []
-    for path, dirs, files in os.walk(paths.root):
-        data.append(sorted(files))
+    scanned = {}
+    stack = [""]
+    while stack:
+        relative = stack.pop()
+        dir = paths.root / relative
+
+        try:
+            mtime = os.stat(dir).st_mtime_ns
+            cached = cache.get(relative)
+            if isinstance(cached, list) and len(cached) == 3 and cached[0] == mtime:
+                _, files, dirs = cached
+            else:
+                files = []
+                dirs = []
+                with os.scandir(dir) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            if not entry.is_symlink():  # os.walk doesn't follow symlinks
+                                dirs.append(entry.name)
+                        else:
+                            files.append(entry.name)
+                files.sort()
+        except OSError:
+            continue  # os.walk ignores directories that can't be listed
+
+        scanned[relative] = [mtime, files, dirs]
+        data.append(files)
+        stack.extend(f"{relative}/{name}" if relative else name for name in dirs)
+
+    if scanned != cache:
+        try:
+            paths.cache.mkdir(parents=True, exist_ok=True)
+            with open(paths.mood_id_cache, "w") as f:
+                f.write(json.dumps(scanned))
+        except OSError as e:
+            logging.warning(f"Failed to save mood ID cache. Reason: {e}")
 
     return md5(str(sorted(data)).encode()).hexdigest()
 
 
+class MonitorRegistry:
+    """
+    Monitors are enumerated once and then only when refreshed, instead of
+    querying the display server every time a popup is opened.
+    """
+
+    def __init__(self) -> None:
+        self.monitors: list[Monitor] | None = None
+        self.enabled: dict[tuple[str, ...], list[Monitor]] = {}  # Disabled monitor names -> enabled monitors
+
+    def refresh(self) -> None:
+        monitors = get_monitors()
+        if monitors != self.monitors:
+            if self.monitors is not None:
+                logging.info(f"Monitors changed: {monitors}")
+            self.monitors = monitors
+            self.enabled = {}
+
+    def all(self) -> list[Monitor]:
+        if self.monitors is None:
+            self.refresh()
+        return self.monitors
+
+    def filtered(self, disabled_monitors: list[str]) -> list[Monitor]:
+        key = tuple(disabled_monitors)
+        monitors = self.all()
+        enabled = self.enabled.get(key)
+        if enabled is None:
+            enabled = [m for m in monitors if m.name not in disabled_monitors]
+            self.enabled[key] = enabled
+        return enabled
+
+
+monitor_registry = MonitorRegistry()
+
+
 def primary_monitor() -> Monitor | None:
-    monitors = get_monitors()
+    monitors = monitor_registry.all()
 
     # Return the first monitor if no primary monitor is found
     return next((m for m in monitors if m.is_primary), monitors[0] if monitors else None)
 
 
 def random_monitor(settings: Settings) -> Monitor:
-    enabled_monitors = [m for m in get_monitors() if m.name not in settings.disabled_monitors]
-    return random.choice(enabled_monitors or primary_monitor())
+    enabled_monitors = monitor_registry.filtered(settings.disabled_monitors)
+    return random.choice(enabled_monitors) if enabled_monitors else primary_monitor()